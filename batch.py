@@ -0,0 +1,103 @@
+# batch.py
+#
+# Traitement groupé : un catalogue Sextan + N fichiers Izydesk (un par corner).
+# Usage : python -m cli sextan.xlsx izydesk_toulouse.xlsx izydesk_nimes.xlsx [--workers 4] (voir cli.py ;
+#         python batch.py, conservé, accepte les mêmes arguments)
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from cache import CHEMIN_CACHE_MATCH
+from export import exporter
+from ingestion import CHEMIN_CACHE_SEXTAN
+from notebook_backend import charger_sextan, process_izydesk, process_izydesk_incremental
+from profiling import ProfilInactif
+
+# Exports consolidés multi-corners (sans extension : une par format demandé)
+NOM_IZYDESK_CONSOLIDE = "izydesk_auto_consolide"
+NOM_MERGED_CONSOLIDE = "merged_data_auto_consolide"
+
+# Étapes de process_batch, dans l'ordre
+ETAPES_BATCH = ("lecture_sextan", "corners", "export_consolide")
+
+# Catalogue Sextan partagé par les processus de travail (chargé une fois par processus)
+_data_sextan = None
+
+
+def _init_worker(data_sextan):
+    global _data_sextan
+    _data_sextan = data_sextan
+
+
+def _traiter_corner(path_izydesk, match_cache_path, export_dir, export_formats, historique_dir, parametres_matching):
+    # Un thread de calcul des scores par processus : les corners occupent déjà les coeurs
+    parametres_matching = {**(parametres_matching or {}), "workers": 1}
+    if historique_dir:
+        return process_izydesk_incremental(
+            _data_sextan, path_izydesk, match_cache_path, historique_dir, export_dir, export_formats=export_formats,
+            parametres_matching=parametres_matching,
+        )
+    return process_izydesk(
+        _data_sextan, path_izydesk, match_cache_path, export_dir, export_formats=export_formats,
+        parametres_matching=parametres_matching,
+    )
+
+
+def process_batch(path_sextan, paths_izydesk, export_dir="exports", workers=None,
+                  match_cache_path=CHEMIN_CACHE_MATCH, sextan_cache_dir=CHEMIN_CACHE_SEXTAN, export_formats=("xlsx",), profil=None,
+                  historique_dir=None, parametres_matching=None, exports=None):
+    """Traite tous les corners en parallèle avec un seul nettoyage du catalogue.
+
+    Écrit les exports par corner et les exports consolidés izydesk / merged,
+    une seule fois par format. Retourne {fichier izydesk: (data_izydesk, merged_data)} ;
+    ``exports`` (dict facultatif) reçoit les chemins consolidés : {"izydesk": {format: chemin}, "merged": ...}.
+    L'avancement de l'étape "corners" compte les corners terminés. Avec
+    ``historique_dir``, chaque corner est traité en mode incrémental.
+    ``parametres_matching`` : paramètres de MoteurMatching (voir matching.py).
+    Chaque corner est rapproché de son sous-catalogue (corners.json) : son
+    moteur et ses entrées du cache de correspondances ne dépendent pas des
+    autres corners.
+    """
+    profil = profil or ProfilInactif()
+    os.makedirs(export_dir, exist_ok=True)
+    with profil.etape("lecture_sextan") as mesure:
+        data_sextan = charger_sextan(path_sextan, sextan_cache_dir)
+        mesure["lignes_sortie"] = len(data_sextan)
+
+    workers = workers or min(len(paths_izydesk), os.cpu_count() or 1)
+    with profil.etape("corners", len(paths_izydesk)), \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_sextan,)) as executor:
+        futures = {
+            path: executor.submit(
+                _traiter_corner, path, match_cache_path, export_dir, export_formats, historique_dir, parametres_matching
+            )
+            for path in paths_izydesk
+        }
+        for fait, _ in enumerate(as_completed(futures.values()), 1):
+            profil.avancement(fait, len(futures))
+        resultats = {path: future.result() for path, future in futures.items()}
+
+    # --- Export consolidé multi-corners ---
+    with profil.etape("export_consolide"):
+        izydesk_consolide = pd.concat([izydesk for izydesk, _ in resultats.values()], ignore_index=True)
+        merged_consolide = pd.concat([merged for _, merged in resultats.values()], ignore_index=True)
+        chemins_izydesk = exporter(izydesk_consolide, NOM_IZYDESK_CONSOLIDE, export_dir, export_formats)
+        chemins_merged = exporter(merged_consolide, NOM_MERGED_CONSOLIDE, export_dir, export_formats)
+        if exports is not None:
+            exports.update(izydesk=chemins_izydesk, merged=chemins_merged)
+
+    return resultats
+
+
+def main(argv=None):
+    """Ancien point d'entrée, conservé pour les scripts existants : mêmes arguments que cli.py."""
+    from cli import main as main_cli
+
+    return main_cli(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
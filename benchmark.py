@@ -0,0 +1,368 @@
+# benchmark.py
+#
+# Mesures et vérifications de non-régression du pipeline Izydesk -> Sextan.
+# Usage :
+#   python benchmark.py matching [taille_catalogue ...]
+#   python benchmark.py explode [nb_commandes ...]
+#   python benchmark.py catalogue [nb_produits ...]
+#   python benchmark.py jointure [nb_commandes ...]
+#   python benchmark.py pipeline --echelle moyenne [--enregistrer] [--tolerance 0.25]
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from matching import SIGNAUX_COMBINES, MoteurMatching, find_best_match
+from notebook_backend import (
+    decouper_noms_sextan,
+    explode_produits,
+    extract_products_corrected,
+    fusionner_sextan,
+    fusionner_sextan_merge,
+    process_files,
+    split_product_info,
+)
+from profiling import ProfilRun
+
+# Références de durée par échelle et par étape (python benchmark.py pipeline --enregistrer)
+CHEMIN_BASELINE = "benchmark_baseline.json"
+
+# Échelles du pipeline complet : (produits Sextan, commandes Izydesk)
+ECHELLES = {
+    "petite": (500, 2_000),
+    "moyenne": (2_000, 20_000),
+    "grande": (10_000, 100_000),
+}
+
+# Étapes trop courtes pour être comparées de façon fiable (secondes)
+DUREE_MIN_COMPARAISON = 0.05
+
+MOTS = [
+    "salade", "cesar", "bowl", "poulet", "pepsi", "max", "ice", "tea", "peche",
+    "muffin", "chocolat", "cookie", "brownie", "sojasun", "vanille", "galette",
+    "porc", "caramel", "pizza", "reine", "focaccia", "pain", "menu", "wrap", "thon",
+    "quiche", "lorraine", "tarte", "citron", "fruit", "frais", "croque", "monsieur",
+    "eau", "cristaline", "cafe", "the", "jus", "orange", "kit", "couverts", "inox",
+]
+VOLUMES = ["", "", "", " 33cl", " 50 cl", " 25cl"]
+
+
+def generer_catalogue(taille, seed=0):
+    rng = random.Random(seed)
+    produits = set()
+    while len(produits) < taille:
+        nom = " ".join(rng.sample(MOTS, rng.randint(1, 4)))
+        produits.add(f"{nom}{rng.choice(VOLUMES)} {rng.randint(1, taille)}")
+    return sorted(produits)
+
+
+def generer_requetes(catalogue, nombre, seed=0):
+    rng = random.Random(seed)
+    requetes = []
+    for _ in range(nombre):
+        prod = rng.choice(catalogue)
+        alea = rng.random()
+        if alea < 0.3:
+            prod = prod[:-1]
+        elif alea < 0.5:
+            prod = " ".join(rng.sample(MOTS, rng.randint(1, 4)))
+        requetes.append(prod)
+    return requetes
+
+
+def generer_izydesk(nb_commandes, catalogue, seed=0):
+    """Commandes Izydesk après lecture : produits multi-lignes "2x nom"."""
+    rng = random.Random(seed)
+    lignes = []
+    for i in range(nb_commandes):
+        produits = [f"{rng.randint(1, 3)}x {rng.choice(catalogue)}" for _ in range(rng.choice([1, 1, 2, 3]))]
+        if rng.random() < 0.05:
+            produits.append("remise fidélité")
+        ht = round(rng.uniform(2, 40), 2)
+        lignes.append({
+            "id_corner": "004",
+            "nom corner": "toulouse",
+            "id_commande": f"C{i // 2}",
+            "date": f"{rng.randint(1, 28):02d}/01/2024",
+            "heure": f"{rng.randint(8, 20)}:{rng.randint(0, 59):02d}",
+            "service": rng.choice(["midi", "soir"]),
+            "produits": "\n".join(produits) if rng.random() > 0.01 else None,
+            "ht": ht,
+            "ttc": round(ht * 1.1, 2),
+        })
+    return pd.DataFrame(lignes)
+
+
+def bench_explode(nb_commandes, taille_catalogue=1_000):
+    df = generer_izydesk(nb_commandes, generer_catalogue(taille_catalogue))
+
+    debut = time.perf_counter()
+    attendu = extract_products_corrected(df)
+    t_iterrows = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    obtenu = explode_produits(df)
+    t_vectorise = time.perf_counter() - debut
+
+    # Équivalence vérifiée par tests/test_explode.py : mesure des durées seulement
+    print(
+        f"commandes={nb_commandes:>6} lignes={len(obtenu)}/{len(attendu)} "
+        f"iterrows={t_iterrows:.2f}s vectorise={t_vectorise:.3f}s "
+        f"gain=x{t_iterrows / max(t_vectorise, 1e-9):.1f}"
+    )
+
+
+def bench_catalogue(nb_produits):
+    noms = generer_sextan(nb_produits)["Nom"]
+
+    # Équivalence vérifiée par tests/test_catalogue.py : mesure des durées seulement
+    debut = time.perf_counter()
+    noms.apply(split_product_info)
+    t_apply = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    decouper_noms_sextan(noms)
+    t_vectorise = time.perf_counter() - debut
+
+    print(
+        f"produits={nb_produits:>6} "
+        f"apply={t_apply:.2f}s vectorise={t_vectorise:.3f}s "
+        f"gain=x{t_apply / max(t_vectorise, 1e-9):.1f}"
+    )
+
+
+def bench_matching(taille, nb_requetes=200):
+    catalogue = generer_catalogue(taille)
+    requetes = generer_requetes(catalogue, nb_requetes)
+
+    debut = time.perf_counter()
+    attendu = [find_best_match(r, catalogue) for r in requetes]
+    t_exhaustif = time.perf_counter() - debut
+
+    # Moteur par matrices de scores : mêmes correspondances avec le ratio seul
+    debut = time.perf_counter()
+    moteur = MoteurMatching(catalogue)
+    obtenu_moteur = [moteur.retenu(c) for c in moteur.candidats(requetes)]
+    t_moteur = time.perf_counter() - debut
+
+    # Score combiné (normalisation + token_set_ratio + partial_ratio) : durée seule
+    debut = time.perf_counter()
+    MoteurMatching(catalogue, signaux=SIGNAUX_COMBINES, normaliser=True).candidats(requetes)
+    t_combine = time.perf_counter() - debut
+
+    assert obtenu_moteur == attendu, "Le moteur ne donne pas les mêmes correspondances"
+    print(
+        f"catalogue={taille:>6} requetes={nb_requetes} "
+        f"exhaustif={t_exhaustif:.2f}s moteur={t_moteur:.2f}s combine={t_combine:.2f}s "
+        f"gain=x{t_exhaustif / max(t_moteur, 1e-9):.1f}"
+    )
+
+
+def generer_lignes_matchees(nb_commandes, catalogue, nb_corners=4, seed=0):
+    """Lignes produits de plusieurs corners après correspondance (entrée de la jointure Sextan)."""
+    df = generer_izydesk(nb_commandes, catalogue, seed)
+    df["id_corner"] = (np.arange(len(df)) % nb_corners).astype(str)
+    df = explode_produits(df).drop(columns=["produits"])
+    df["produit_match"] = df["produit"].where(np.arange(len(df)) % 20 != 0, "produit inconnu")
+    # Doublons de lignes de commande (exports qui se recouvrent)
+    return pd.concat([df, df.iloc[: len(df) // 10]]).reset_index(drop=True)
+
+
+def mesurer(fonction, *args):
+    """Durée et pic mémoire (tracemalloc, Mo) d'un appel ; retourne aussi le résultat."""
+    tracemalloc.start()
+    debut = time.perf_counter()
+    resultat = fonction(*args)
+    duree = time.perf_counter() - debut
+    pic = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return resultat, duree, pic
+
+
+def bench_jointure(nb_commandes, taille_catalogue=5_000):
+    catalogue = generer_catalogue(taille_catalogue)
+    # Catalogue Sextan avec quelques noms en double (même produit dans deux catégories)
+    data_sextan = pd.DataFrame({"id_sextan": np.arange(taille_catalogue + 50), "produit_sextan": catalogue + catalogue[:50]})
+    data_sextan["famille"] = "famille"
+    data_sextan["cout_unitaire"] = 1.5
+    data_izydesk = generer_lignes_matchees(nb_commandes, catalogue)
+
+    # Équivalence vérifiée par tests/test_jointure.py : mesure des durées et de la mémoire seulement
+    _, t_merge, pic_merge = mesurer(fusionner_sextan_merge, data_izydesk, data_sextan)
+    _, t_jointure, pic_jointure = mesurer(fusionner_sextan, data_izydesk, data_sextan)
+
+    print(
+        f"lignes={len(data_izydesk):>8} "
+        f"merge={t_merge:.2f}s ({pic_merge:.0f} Mo) jointure={t_jointure:.3f}s ({pic_jointure:.0f} Mo) "
+        f"gain=x{t_merge / max(t_jointure, 1e-9):.1f}"
+    )
+
+
+# --- Générateurs d'exports réalistes ---
+CATEGORIES_SEXTAN = ["Entrée", "Plat", "Dessert", "Boisson", "1", "2", "3"]
+FAMILLES_SEXTAN = ["Salade", "Plat chaud", "Dessert", "Fruit", "Pepsi", "Boisson", "Snack", "Menu", "Pain", None, None, "FTV", "LMF"]
+CONTENANTS = ["Bol kraft 750ml", "Pot 500ml", "Boîte", "Verre", "Canette"]
+PRODUITS_SPECIAUX = ["Menu midi + boisson", "Café offert", "Anti-gaspi plat", "Anti-gaspi dessert", "Kit couverts inox", "Sac kraft"]
+
+
+def generer_sextan(taille, seed=0):
+    """Catalogue Sextan brut : nom "catégorie | produit | contenant | dlc", famille, coût unit. en €."""
+    rng = random.Random(seed)
+    lignes = []
+    for i, produit in enumerate(generer_catalogue(taille, seed)):
+        parties = [rng.choice(CATEGORIES_SEXTAN), produit.capitalize()]
+        if rng.random() < 0.7:
+            parties.append(rng.choice(CONTENANTS))
+        if rng.random() < 0.4:
+            parties.append(f"J+{rng.randint(1, 5)}")
+        lignes.append({
+            "Unnamed: 0": i,
+            "N°": i + 1,
+            "Nom": " | ".join(parties),
+            "Marque": "Maison",
+            "Famille": rng.choice(FAMILLES_SEXTAN),
+            "Coût unit.": f"{rng.uniform(0.2, 9):.2f}".replace(".", ",") + " €",
+            "Prix HT": f"{rng.uniform(2, 15):.2f}",
+            "Stock": rng.randint(0, 50),
+        })
+    return pd.DataFrame(lignes)
+
+
+def generer_export_izydesk(nb_commandes, catalogue, seed=0):
+    """Export Izydesk brut : colonne "commandes du ... au ...", produits multi-lignes, paiements "CB:12,50€"."""
+    rng = random.Random(seed)
+    noms = list(catalogue) + PRODUITS_SPECIAUX
+    lignes = []
+    for i in range(nb_commandes):
+        produits = []
+        for _ in range(rng.choice([1, 1, 1, 2, 3])):
+            nom = rng.choice(noms)
+            if rng.random() < 0.2:
+                nom = nom[:-1]  # faute de frappe
+            produits.append(f"{rng.randint(1, 3)}x {nom.capitalize()}")
+        ttc = round(rng.uniform(3, 40), 2)
+        lignes.append({
+            "Commandes du 01/01/2024 au 31/01/2024": f"#{100000 + i}",
+            "Date": f"{rng.randint(1, 31):02d}/01/2024",
+            "Heure": f"{rng.randint(8, 20):02d}:{rng.randint(0, 59):02d}",
+            "Service": rng.choice(["Midi", "Soir", "Click & collect"]),
+            "Produits": "\n".join(produits),
+            "HT": round(ttc / 1.1, 2),
+            "TTC": ttc,
+            "Paiements": f"{rng.choice(['CB', 'Espèces', 'Ticket restaurant'])}:{ttc:.2f}€".replace(".", ","),
+        })
+    return pd.DataFrame(lignes)
+
+
+# --- Pipeline complet, mesuré par étape ---
+def bench_pipeline(echelle, seed=0):
+    taille_catalogue, nb_commandes = ECHELLES[echelle]
+    data_sextan = generer_sextan(taille_catalogue, seed)
+    catalogue = data_sextan["Nom"].str.split("|").str[1].str.strip()
+    data_izydesk = generer_export_izydesk(nb_commandes, catalogue, seed)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        path_sextan = os.path.join(dossier, "sextan.xlsx")
+        path_izydesk = os.path.join(dossier, "izydesk_toulouse.xlsx")
+        data_sextan.to_excel(path_sextan, index=False)
+        data_izydesk.to_excel(path_izydesk, index=False)
+
+        # Sans caches ni tracemalloc : on mesure le travail réel
+        profil = ProfilRun(tracer_memoire=False)
+        process_files(path_sextan, path_izydesk, match_cache_path=None, sextan_cache_dir=None,
+                      export_dir=dossier, profil=profil, prix_cache_dir=None)
+
+    resultats = {}
+    for mesure in profil.etapes:
+        lignes = mesure["lignes_entree"] or mesure["lignes_sortie"] or 0
+        resultats[mesure["etape"]] = {
+            "duree_s": mesure["duree_s"],
+            "lignes_par_s": round(lignes / mesure["duree_s"]) if mesure["duree_s"] else None,
+        }
+    return resultats
+
+
+def comparer_baseline(echelle, resultats, baseline, tolerance):
+    """Retourne les étapes plus lentes que la référence au-delà de la tolérance."""
+    regressions = []
+    reference = baseline.get(echelle, {})
+    for etape, mesure in resultats.items():
+        ref = reference.get(etape)
+        if not ref or ref["duree_s"] < DUREE_MIN_COMPARAISON:
+            continue
+        ratio = mesure["duree_s"] / ref["duree_s"]
+        statut = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        print(f"  {etape:<16} {ref['duree_s']:>8.3f}s -> {mesure['duree_s']:>8.3f}s  x{ratio:.2f}  {statut}")
+        if statut == "REGRESSION":
+            regressions.append(etape)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline Sextan / Izydesk")
+    sous = parser.add_subparsers(dest="commande", required=True)
+    p_matching = sous.add_parser("matching", help="moteur par matrices de scores (cdist) contre find_best_match")
+    p_matching.add_argument("tailles", nargs="*", type=int, default=[1_000, 10_000, 50_000])
+    p_explode = sous.add_parser("explode", help="éclatement vectorisé contre iterrows")
+    p_explode.add_argument("commandes", nargs="*", type=int, default=[1_000, 10_000])
+    p_catalogue = sous.add_parser("catalogue", help="découpage vectorisé des noms Sextan contre apply")
+    p_catalogue.add_argument("produits", nargs="*", type=int, default=[1_000, 10_000])
+    p_jointure = sous.add_parser("jointure", help="jointure Sextan sur codes entiers contre merge + apply")
+    p_jointure.add_argument("commandes", nargs="*", type=int, default=[50_000, 200_000])
+    p_pipeline = sous.add_parser("pipeline", help="process_files complet, mesuré par étape")
+    p_pipeline.add_argument("--echelle", choices=ECHELLES, default="petite")
+    p_pipeline.add_argument("--enregistrer", action="store_true", help="enregistre les mesures comme référence")
+    p_pipeline.add_argument("--tolerance", type=float, default=0.25, help="ralentissement toléré (0.25 = +25 %%)")
+    p_pipeline.add_argument("--repetitions", type=int, default=3, help="nombre d'exécutions (meilleur temps retenu)")
+    args = parser.parse_args(argv)
+
+    if args.commande == "matching":
+        for taille in args.tailles:
+            bench_matching(taille)
+    elif args.commande == "explode":
+        for nb_commandes in args.commandes:
+            bench_explode(nb_commandes)
+    elif args.commande == "catalogue":
+        for nb_produits in args.produits:
+            bench_catalogue(nb_produits)
+    elif args.commande == "jointure":
+        for nb_commandes in args.commandes:
+            bench_jointure(nb_commandes)
+    else:
+        # Meilleur temps par étape sur plusieurs exécutions, pour limiter le bruit
+        resultats = {}
+        for _ in range(args.repetitions):
+            for etape, mesure in bench_pipeline(args.echelle).items():
+                if etape not in resultats or mesure["duree_s"] < resultats[etape]["duree_s"]:
+                    resultats[etape] = mesure
+        baseline = {}
+        if os.path.exists(CHEMIN_BASELINE):
+            with open(CHEMIN_BASELINE, encoding="utf-8") as f:
+                baseline = json.load(f)
+
+        print(f"Échelle {args.echelle} : {ECHELLES[args.echelle][0]} produits, {ECHELLES[args.echelle][1]} commandes")
+        for etape, mesure in resultats.items():
+            print(f"  {etape:<16} {mesure['duree_s']:>8.3f}s  {mesure['lignes_par_s'] or 0:>10} lignes/s")
+
+        if args.enregistrer:
+            baseline[args.echelle] = resultats
+            with open(CHEMIN_BASELINE, "w", encoding="utf-8") as f:
+                json.dump(baseline, f, ensure_ascii=False, indent=2)
+            print(f"Référence enregistrée dans {CHEMIN_BASELINE}")
+        elif args.echelle in baseline:
+            print("Comparaison avec la référence :")
+            if comparer_baseline(args.echelle, resultats, baseline, args.tolerance):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
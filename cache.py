@@ -0,0 +1,107 @@
+# cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Emplacement par défaut du cache de correspondances (à côté de exports/)
+CHEMIN_CACHE_MATCH = "cache/correspondances.sqlite"
+
+# Nombre maximal d'entrées conservées avant éviction des moins récemment utilisées
+TAILLE_MAX_CACHE = 200_000
+
+# Nombre de paramètres par requête SQL (limite SQLite)
+_TAILLE_LOT = 500
+
+
+def empreinte_catalogue(produits_sextan, seuil, parametres=None):
+    """Empreinte du catalogue Sextan (ordre compris : il départage les ex aequo) et des paramètres du matching."""
+    h = hashlib.sha1(f"seuil={seuil}\n".encode("utf-8"))
+    if parametres:
+        h.update(json.dumps(parametres, sort_keys=True).encode("utf-8"))
+    for prod in produits_sextan:
+        h.update(str(prod).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+class MatchCache:
+    """Cache SQLite persistant des candidats Sextan de chaque nom Izydesk.
+
+    Clé : (nom Izydesk normalisé, empreinte du catalogue et des paramètres du
+    matching). Valeur : liste des candidats (produit, score). Une entrée dont
+    l'empreinte ne correspond plus au catalogue courant n'est jamais relue
+    et finit évincée avec les entrées les moins récemment utilisées.
+    """
+
+    def __init__(self, chemin=CHEMIN_CACHE_MATCH, taille_max=TAILLE_MAX_CACHE):
+        self.chemin = chemin
+        self.taille_max = taille_max
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        with self._connexion() as conn:
+            # Ancien format (une seule correspondance, sans score) : jamais relu
+            conn.execute("DROP TABLE IF EXISTS correspondances")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS candidats (
+                    produit TEXT NOT NULL,
+                    empreinte TEXT NOT NULL,
+                    candidats TEXT NOT NULL,
+                    utilise REAL NOT NULL,
+                    PRIMARY KEY (produit, empreinte)
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_candidats_utilise ON candidats (utilise)")
+
+    @contextmanager
+    def _connexion(self):
+        conn = sqlite3.connect(self.chemin, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, produits, empreinte):
+        """Retourne {produit: ((produit_sextan, score), ...)} pour les produits présents."""
+        trouves = {}
+        produits = list(produits)
+        maintenant = time.time()
+        with self._connexion() as conn:
+            for i in range(0, len(produits), _TAILLE_LOT):
+                lot = produits[i:i + _TAILLE_LOT]
+                marques = ",".join("?" * len(lot))
+                lignes = conn.execute(
+                    f"SELECT produit, candidats FROM candidats "
+                    f"WHERE empreinte = ? AND produit IN ({marques})",
+                    [empreinte, *lot],
+                ).fetchall()
+                trouves.update((produit, tuple(map(tuple, json.loads(c)))) for produit, c in lignes)
+                conn.execute(
+                    f"UPDATE candidats SET utilise = ? "
+                    f"WHERE empreinte = ? AND produit IN ({marques})",
+                    [maintenant, empreinte, *lot],
+                )
+        return trouves
+
+    def put_many(self, candidats, empreinte):
+        maintenant = time.time()
+        with self._connexion() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO candidats VALUES (?, ?, ?, ?)",
+                [(produit, empreinte, json.dumps(c, ensure_ascii=False), maintenant) for produit, c in candidats.items()],
+            )
+            self._evincer(conn)
+
+    def _evincer(self, conn):
+        nb = conn.execute("SELECT COUNT(*) FROM candidats").fetchone()[0]
+        if nb > self.taille_max:
+            conn.execute(
+                "DELETE FROM candidats WHERE rowid IN ("
+                "SELECT rowid FROM candidats ORDER BY utilise LIMIT ?)",
+                (nb - self.taille_max,),
+            )
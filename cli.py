@@ -0,0 +1,153 @@
+# cli.py
+#
+# Point d'entrée en ligne de commande, sans Streamlit, pour les traitements
+# planifiés (cron, systemd). Les modules du pipeline ne sont importés qu'au
+# moment où le traitement demandé en a besoin.
+# Usage :
+#   python -m cli sextan.xlsx "exports_izydesk/izydesk_*.xlsx" [--exports exports] [--formats xlsx parquet]
+#                 [--incremental | --par-blocs 50000] [--seuil 80] [--score-combine] [--profile [profil.json]]
+#                 [--profile-memoire]
+# Code de sortie : 0 si tout est traité, 1 si le traitement échoue, 2 si les arguments sont invalides.
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger("cli")
+
+# Codes de sortie
+OK, ECHEC, ARGUMENTS_INVALIDES = 0, 1, 2
+
+# Formats d'export proposés (dupliqués de export.FORMATS_EXPORT pour ne pas importer pandas au démarrage)
+FORMATS = ("xlsx", "parquet", "csv")
+
+
+def developper_motifs(motifs):
+    """Chemins correspondant aux chemins ou motifs glob, sans doublons et dans l'ordre.
+
+    Lève FileNotFoundError si un motif ne correspond à aucun fichier.
+    """
+    chemins = []
+    for motif in motifs:
+        trouves = sorted(glob.glob(motif)) if glob.has_magic(motif) else [motif] if os.path.exists(motif) else []
+        if not trouves:
+            raise FileNotFoundError(f"aucun fichier ne correspond à {motif}")
+        chemins.extend(c for c in trouves if c not in chemins)
+    return chemins
+
+
+def _parametres_matching(args):
+    from matching import SIGNAUX_COMBINES
+
+    parametres = {} if args.seuil is None else {"seuil": args.seuil}
+    if args.score_combine:
+        parametres.update(signaux=SIGNAUX_COMBINES, normaliser=True)
+    return parametres
+
+
+def traiter(args, profil):
+    """Lance le traitement demandé ; retourne {fichier izydesk: résumé du résultat}."""
+    parametres_matching = _parametres_matching(args)
+    if len(args.izydesk) > 1:
+        from batch import process_batch
+        from historique import CHEMIN_HISTORIQUE
+
+        resultats = process_batch(
+            args.sextan, args.izydesk, args.exports, args.workers, export_formats=args.formats, profil=profil,
+            historique_dir=CHEMIN_HISTORIQUE if args.incremental else None, parametres_matching=parametres_matching,
+        )
+        return {path: f"{len(merged)} lignes" for path, (_, merged) in resultats.items()}
+
+    path_izydesk = args.izydesk[0]
+    if args.par_blocs:
+        from notebook_backend import process_files_par_blocs
+
+        _, chemin_merged = process_files_par_blocs(
+            args.sextan, path_izydesk, args.par_blocs, export_dir=args.exports, profil=profil,
+            parametres_matching=parametres_matching,
+        )
+        return {path_izydesk: f"export {chemin_merged}" if chemin_merged else "fichier vide"}
+
+    if args.incremental:
+        from notebook_backend import process_files_incremental as traitement
+    else:
+        from notebook_backend import process_files as traitement
+    _, merged = traitement(
+        args.sextan, path_izydesk, export_dir=args.exports, profil=profil, export_formats=args.formats,
+        parametres_matching=parametres_matching,
+    )
+    return {path_izydesk: f"{len(merged)} lignes"}
+
+
+def creer_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Fusion Sextan / Izydesk (traitements planifiés)")
+    parser.add_argument("sextan", help="catalogue Sextan (xlsx, csv ou parquet)")
+    parser.add_argument("izydesk", nargs="+", help="fichiers Izydesk ou motifs glob (entre guillemets), un fichier par corner")
+    parser.add_argument("--exports", default="exports", help="dossier des exports")
+    parser.add_argument("--formats", nargs="+", default=["xlsx"], choices=FORMATS, help="formats d'export")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true", help="ne traiter que les commandes nouvelles ou modifiées")
+    mode.add_argument("--par-blocs", type=int, metavar="LIGNES", help="lecture par blocs (un seul fichier Izydesk, export xlsx)")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus (plusieurs corners)")
+    parser.add_argument("--seuil", type=int, help="score minimal d'une correspondance (0-100, 80 par défaut)")
+    parser.add_argument("--score-combine", action="store_true",
+                        help="noms sans volume, score ratio + token_set_ratio + partial_ratio (plus lent)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="JSON",
+                        help="mesure chaque étape ; rapport JSON (par défaut dans le dossier des exports)")
+    parser.add_argument("--profile-memoire", action="store_true",
+                        help="avec --profile, pic des allocations de chaque étape (tracemalloc, plus lent)")
+    return parser
+
+
+def main(argv=None):
+    parser = creer_parser()
+    args = parser.parse_args(argv)
+    if args.profile_memoire and args.profile is None:
+        args.profile = ""
+    logging.basicConfig(level=logging.INFO if args.profile is not None else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    try:
+        args.sextan = developper_motifs([args.sextan])[0]
+        args.izydesk = developper_motifs(args.izydesk)
+    except FileNotFoundError as e:
+        parser.print_usage(sys.stderr)
+        print(f"erreur : {e}", file=sys.stderr)
+        return ARGUMENTS_INVALIDES
+    if args.par_blocs and len(args.izydesk) > 1:
+        parser.print_usage(sys.stderr)
+        print("erreur : --par-blocs ne traite qu'un seul fichier Izydesk", file=sys.stderr)
+        return ARGUMENTS_INVALIDES
+
+    from profiling import ProfilInactif, ProfilRun
+
+    # tracemalloc multiplie les durées : seulement avec --profile-memoire (sinon mémoire résidente par étape)
+    profil = ProfilRun(tracer_memoire=args.profile_memoire) if args.profile is not None else ProfilInactif()
+    debut = time.perf_counter()
+    try:
+        # Dossier des exports créé au besoin (ex. dossier daté d'un traitement planifié)
+        os.makedirs(args.exports, exist_ok=True)
+        resultats = traiter(args, profil)
+    except Exception:
+        logger.exception("Échec du traitement de %s", ", ".join(args.izydesk))
+        return ECHEC
+    finally:
+        profil.arreter()
+
+    for path, resume in resultats.items():
+        print(f"{os.path.basename(path)} : {resume}")
+    print(f"{len(resultats)} fichier(s) traité(s) en {time.perf_counter() - debut:.1f}s")
+
+    if args.profile is not None:
+        chemin = args.profile or os.path.join(args.exports, f"profil_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+        profil.ecrire_json(chemin)
+        print(f"Profil d'exécution : {chemin}")
+    return OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# corners.py
+#
+# Registre des corners (corners.json) : identifiant, nom, mots-clés de
+# détection et sous-catalogue Sextan éventuel. Le registre est lu une seule
+# fois par processus ; ajouter un site ne demande que d'éditer le fichier.
+#
+#   {"corners": [{"id_corner": "004", "nom_corner": "toulouse", "mots_cles": ["toulouse"],
+#                 "catalogue": {"categorie": ["plat", "boisson"]}}]}
+#
+# "mots_cles" (nom du corner par défaut) sont cherchés dans le nom du fichier
+# et dans la colonne corner de l'export ; "catalogue" (facultatif) restreint
+# le catalogue Sextan du corner aux lignes dont chaque colonne citée prend
+# l'une des valeurs listées.
+
+import json
+import logging
+import numbers
+import os
+from functools import lru_cache
+
+from normalisation import sans_accents
+
+logger = logging.getLogger(__name__)
+
+CHEMIN_REGISTRE_CORNERS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corners.json")
+
+# Colonnes d'un export Izydesk (en minuscules) qui peuvent désigner le corner
+COLONNES_CORNER = ("id_corner", "corner", "nom corner", "point de vente", "boutique", "magasin", "site", "etablissement")
+
+
+@lru_cache(maxsize=None)
+def charger_registre(chemin=CHEMIN_REGISTRE_CORNERS):
+    """Corners du registre, dans l'ordre du fichier (le premier mot-clé trouvé l'emporte)."""
+    with open(chemin, encoding="utf-8") as f:
+        entrees = json.load(f)["corners"]
+
+    corners = []
+    for entree in entrees:
+        if "id_corner" not in entree or "nom_corner" not in entree:
+            raise ValueError(f"{chemin} : id_corner et nom_corner sont obligatoires ({entree})")
+        corners.append({
+            "id_corner": _texte_valeur(entree["id_corner"]),
+            "nom_corner": entree["nom_corner"],
+            "mots_cles": tuple(sans_accents(mot) for mot in entree.get("mots_cles") or [entree["nom_corner"]]),
+            "catalogue": entree.get("catalogue") or {},
+        })
+    noms = [corner["nom_corner"] for corner in corners]
+    if len(set(noms)) != len(noms):
+        raise ValueError(f"{chemin} : nom_corner en double")
+    return tuple(corners)
+
+
+def corner_par_nom(nom_corner, registre=None):
+    for corner in registre or charger_registre():
+        if corner["nom_corner"] == nom_corner:
+            return corner
+    raise ValueError(f"Corner {nom_corner!r} absent du registre")
+
+
+def _texte_valeur(valeur):
+    # Identifiant numérique lu en flottant (colonne avec des cellules vides) : 4.0 -> "4"
+    if isinstance(valeur, numbers.Real) and not isinstance(valeur, bool) and float(valeur).is_integer():
+        return str(int(valeur))
+    return str(valeur)
+
+
+def _corner_du_texte(texte, registre):
+    texte = sans_accents(str(texte)).strip()
+    for corner in registre:
+        if texte.lstrip("0") == corner["id_corner"].lstrip("0") or any(mot in texte for mot in corner["mots_cles"]):
+            return corner
+    return None
+
+
+def _corner_du_contenu(data_izydesk, registre):
+    # Valeur la plus fréquente de la première colonne corner renseignée
+    for col in data_izydesk.columns:
+        if sans_accents(str(col)).strip() in COLONNES_CORNER:
+            valeurs = data_izydesk[col].dropna()
+            if not valeurs.empty:
+                return _corner_du_texte(valeurs.map(_texte_valeur).mode().iloc[0], registre)
+    return None
+
+
+def detecter_corner(data_izydesk, nom_fichier, registre=None):
+    """Corner d'un export Izydesk : colonne corner du contenu, sinon mots-clés du nom de fichier.
+
+    Le contenu l'emporte sur un fichier mal nommé. Lève ValueError si aucun
+    corner du registre ne correspond.
+    """
+    registre = registre or charger_registre()
+    nom_fichier = os.path.basename(str(nom_fichier))
+    par_contenu = _corner_du_contenu(data_izydesk, registre)
+    par_nom = next((c for c in registre if any(mot in sans_accents(nom_fichier) for mot in c["mots_cles"])), None)
+
+    if par_contenu is not None:
+        if par_nom is not None and par_nom is not par_contenu:
+            logger.warning("%s : corner %s d'après le contenu, %s d'après le nom du fichier",
+                           nom_fichier, par_contenu["nom_corner"], par_nom["nom_corner"])
+        return par_contenu
+    if par_nom is not None:
+        return par_nom
+    raise ValueError(
+        f"Corner introuvable pour {nom_fichier} : ni le nom du fichier ni une colonne corner "
+        f"({', '.join(COLONNES_CORNER)}) ne désignent un corner du registre "
+        f"({', '.join(c['nom_corner'] for c in registre)})"
+    )
+
+
+def catalogue_corner(data_sextan, nom_corner, registre=None):
+    """Catalogue Sextan du corner : lignes retenues par son filtre "catalogue", tout le catalogue sinon."""
+    filtre = corner_par_nom(nom_corner, registre)["catalogue"]
+    if not filtre:
+        return data_sextan
+    garder = None
+    for col, valeurs in filtre.items():
+        masque = data_sextan[col].isin(valeurs)
+        garder = masque if garder is None else garder & masque
+    return data_sextan[garder].reset_index(drop=True)
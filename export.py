@@ -0,0 +1,110 @@
+# export.py
+
+import os
+import shutil
+import threading
+
+import pandas as pd
+import xlsxwriter
+
+# Formats d'export disponibles (parquet / csv : chargement BI plus rapide que xlsx)
+FORMATS_EXPORT = ("xlsx", "parquet", "csv")
+
+# Au-delà de ce nombre de lignes, le classeur est écrit ligne à ligne en constant_memory
+SEUIL_CONSTANT_MEMORY = 50_000
+
+
+class ClasseurIncremental:
+    """Classeur xlsx écrit bloc par bloc (mode constant_memory de xlsxwriter).
+
+    Les lignes sont écrites au fur et à mesure : la mémoire ne dépend pas du
+    nombre total de lignes exportées. ``chemin`` peut aussi être un buffer.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.classeur = xlsxwriter.Workbook(chemin, {
+            "constant_memory": True,
+            "nan_inf_to_errors": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        })
+        self.feuille = self.classeur.add_worksheet()
+        self.format_entete = self.classeur.add_format({"bold": True, "border": 1, "align": "center"})
+        self.colonnes = None
+        self.ligne = 0
+
+    def ajouter(self, df):
+        if self.colonnes is None:
+            self.colonnes = list(df.columns)
+            self.feuille.write_row(0, 0, [str(c) for c in self.colonnes], self.format_entete)
+            self.ligne = 1
+        valeurs = df[self.colonnes].astype(object)
+        valeurs = valeurs.where(valeurs.notna(), None)
+        for ligne in valeurs.itertuples(index=False, name=None):
+            self.feuille.write_row(self.ligne, 0, ligne)
+            self.ligne += 1
+
+    def fermer(self):
+        self.classeur.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def ecrire_excel(df, destination):
+    """Écrit ``df`` en xlsx (chemin ou buffer) avec xlsxwriter, en constant_memory pour les gros volumes."""
+    if len(df) > SEUIL_CONSTANT_MEMORY:
+        with ClasseurIncremental(destination) as classeur:
+            classeur.ajouter(df)
+    else:
+        with pd.ExcelWriter(destination, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False)
+
+
+def _ecrire_parquet(df, chemin):
+    try:
+        df.to_parquet(chemin, index=False)
+    except (TypeError, ValueError):
+        # Colonnes texte de types mixtes (ex. famille numérique) : converties en texte
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].astype("string")
+        df.to_parquet(chemin, index=False)
+
+
+def exporter(df, nom, export_dir, formats=("xlsx",)):
+    """Écrit ``df`` une seule fois par format demandé. Retourne {format: chemin}."""
+    chemins = {}
+    for fmt in formats:
+        chemin = os.path.join(export_dir, f"{nom}.{fmt}")
+        if fmt == "xlsx":
+            ecrire_excel(df, chemin)
+        elif fmt == "parquet":
+            _ecrire_parquet(df, chemin)
+        elif fmt == "csv":
+            # ";" et BOM UTF-8 : ouverture directe dans Excel en français
+            df.to_csv(chemin, index=False, sep=";", encoding="utf-8-sig")
+        else:
+            raise ValueError(f"Format d'export inconnu : {fmt} (formats possibles : {', '.join(FORMATS_EXPORT)})")
+        chemins[fmt] = chemin
+    return chemins
+
+
+def publier(dossier, export_dir):
+    """Copie les exports de ``dossier`` (propre à un traitement) dans ``export_dir``. Retourne les chemins publiés.
+
+    Chaque fichier est copié sous un nom temporaire puis renommé : un lecteur
+    ou un traitement concurrent ne voit jamais de fichier à moitié écrit.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    publies = []
+    for nom in sorted(os.listdir(dossier)):
+        destination = os.path.join(export_dir, nom)
+        temporaire = f"{destination}.{os.getpid()}_{threading.get_ident()}.tmp"
+        shutil.copyfile(os.path.join(dossier, nom), temporaire)
+        os.replace(temporaire, destination)
+        publies.append(destination)
+    return publies
@@ -0,0 +1,133 @@
+# historique.py
+#
+# Historique des résultats par corner pour le traitement incrémental : les
+# exports Izydesk mensuels sont cumulatifs, seules les commandes nouvelles ou
+# modifiées depuis le dernier passage sont retraitées.
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité aux threads du processus
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from ingestion import ecrire_table, lire_table
+
+CHEMIN_HISTORIQUE = "cache/historique"
+
+# À incrémenter quand le traitement change : l'historique existant est alors ignoré
+VERSION_HISTORIQUE = 2
+
+# Identifiant d'une commande (une ligne brute Izydesk, avant éclatement des produits)
+CLE_COMMANDE = ["id_commande", "date", "heure", "service"]
+
+
+def cles_commandes(df):
+    """Empreinte de la clé de commande de chaque ligne (uint64)."""
+    return pd.util.hash_pandas_object(df[CLE_COMMANDE], index=False).to_numpy()
+
+
+def empreintes_commandes(data_izydesk):
+    """Une ligne par commande : clé et empreinte du contenu de toutes ses lignes brutes.
+
+    L'empreinte est la somme (modulo 2**64) des hash des lignes : elle ne dépend
+    pas de l'ordre des lignes et change si l'une d'elles est modifiée.
+    """
+    colonnes = sorted(data_izydesk.columns)
+    commandes = pd.DataFrame({
+        "cle": cles_commandes(data_izydesk),
+        "empreinte": pd.util.hash_pandas_object(data_izydesk[colonnes], index=False).to_numpy(),
+    })
+    return commandes.groupby("cle", sort=False)["empreinte"].sum().reset_index()
+
+
+def commandes_a_traiter(commandes, commandes_historique):
+    """Clés des commandes nouvelles et des commandes modifiées par rapport à l'historique."""
+    if commandes_historique is None:
+        return commandes["cle"].to_numpy(), np.array([], dtype=np.uint64)
+    inchangees = commandes.merge(commandes_historique, on=["cle", "empreinte"])["cle"].to_numpy()
+    nouvelles = ~np.isin(commandes["cle"].to_numpy(), commandes_historique["cle"].to_numpy())
+    modifiees = ~nouvelles & ~np.isin(commandes["cle"].to_numpy(), inchangees)
+    return commandes.loc[nouvelles, "cle"].to_numpy(), commandes.loc[modifiees, "cle"].to_numpy()
+
+
+def produits_prix_modifies(prix, prix_historique):
+    """Produits dont les lignes de la table des prix unitaires ont changé depuis le dernier passage."""
+    if prix_historique is None:
+        return np.array([], dtype=object)
+    comparaison = prix.merge(prix_historique, how="outer", indicator=True)
+    return comparaison.loc[comparaison["_merge"] != "both", "produit"].unique()
+
+
+# Un verrou par historique de corner pour les threads du processus (jobs Streamlit)
+_verrous = {}
+_verrou_verrous = threading.Lock()
+
+
+class HistoriqueCorner:
+    """Résultats déjà traités d'un corner : données Izydesk, données fusionnées,
+    commandes et table des prix unitaires.
+
+    L'historique n'est relu que s'il a été produit avec le même catalogue
+    Sextan et les mêmes paramètres de correspondance (empreinte du moteur)
+    et la même VERSION_HISTORIQUE.
+    """
+
+    def __init__(self, nom_corner, dossier=CHEMIN_HISTORIQUE):
+        self.dossier = dossier
+        self.nom_corner = nom_corner
+
+    @contextmanager
+    def verrou(self):
+        """Un seul traitement du corner à la fois entre la lecture et l'écriture de l'historique.
+
+        Verrou de thread, doublé d'un verrou sur fichier entre processus (workers de batch.py).
+        """
+        with _verrou_verrous:
+            verrou_thread = _verrous.setdefault((os.path.abspath(self.dossier), self.nom_corner), threading.Lock())
+        with verrou_thread:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.dossier, exist_ok=True)
+            with open(self._chemin("verrou"), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _chemin(self, table):
+        return os.path.join(self.dossier, f"{self.nom_corner}_{table}")
+
+    def _version(self, empreinte_catalogue):
+        return {"version": VERSION_HISTORIQUE, "catalogue": empreinte_catalogue}
+
+    def charger(self, empreinte_catalogue):
+        """Retourne (data_izydesk, merged_data, commandes, prix), ou None si l'historique est absent ou périmé."""
+        try:
+            with open(self._chemin("version.json"), encoding="utf-8") as f:
+                version = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if version != self._version(empreinte_catalogue):
+            return None
+        return tuple(lire_table(self._chemin(table)) for table in ("izydesk", "merged", "commandes", "prix"))
+
+    def enregistrer(self, data_izydesk, merged_data, commandes, prix, empreinte_catalogue):
+        # Le fichier de version est écrit en dernier : il valide les tables
+        os.makedirs(self.dossier, exist_ok=True)
+        if os.path.exists(self._chemin("version.json")):
+            os.remove(self._chemin("version.json"))
+        ecrire_table(data_izydesk, self._chemin("izydesk"))
+        ecrire_table(merged_data, self._chemin("merged"))
+        ecrire_table(commandes, self._chemin("commandes"))
+        ecrire_table(prix, self._chemin("prix"))
+        with open(self._chemin("version.json"), "w", encoding="utf-8") as f:
+            json.dump(self._version(empreinte_catalogue), f)
@@ -0,0 +1,172 @@
+# ingestion.py
+
+import hashlib
+import importlib.util
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+# Cache des catalogues Sextan déjà lus et nettoyés
+CHEMIN_CACHE_SEXTAN = "cache/sextan"
+
+# Lecteur xlsx rapide (python-calamine, pandas >= 2.2) ; openpyxl sinon
+MOTEUR_EXCEL = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+# Format du cache : parquet si pyarrow est installé, pickle sinon
+FORMAT_CACHE = "parquet" if importlib.util.find_spec("pyarrow") else "pickle"
+
+
+def _extension(nom):
+    return os.path.splitext(str(nom))[1].lower()
+
+
+def _contenu(source):
+    """Octets du fichier (chemin ou fichier uploadé / buffer)."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    return source.read()
+
+
+def nom_source(source, nom=None):
+    """Nom du fichier (chemin, fichier uploadé ou buffer nommé)."""
+    if nom:
+        return nom
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", "")
+
+
+def empreinte_fichier(source, contenu=None):
+    """Hash du contenu du fichier : identifie un export quel que soit son nom."""
+    return hashlib.sha1(_contenu(source) if contenu is None else contenu).hexdigest()
+
+
+def _separateur_csv(premiere_ligne):
+    # Export Excel français : séparateur ";" le plus souvent
+    return ";" if premiere_ligne.count(b";") > premiere_ligne.count(b",") else ","
+
+
+def _lire_csv(contenu):
+    sep = _separateur_csv(contenu.split(b"\n", 1)[0])
+    # Séparateur ";" : format français, virgule décimale ("9,09")
+    return pd.read_csv(BytesIO(contenu), sep=sep, decimal="," if sep == ";" else ".")
+
+
+def lire_tableau(source, nom=None, contenu=None):
+    """Lit un export xlsx, csv ou parquet (chemin, fichier uploadé ou buffer)."""
+    nom = nom_source(source, nom)
+    if contenu is None:
+        contenu = _contenu(source)
+    extension = _extension(nom)
+
+    if extension == ".csv":
+        return _lire_csv(contenu)
+    if extension == ".parquet":
+        return pd.read_parquet(BytesIO(contenu))
+    if MOTEUR_EXCEL:
+        try:
+            return pd.read_excel(BytesIO(contenu), engine=MOTEUR_EXCEL)
+        except (ValueError, ImportError):
+            pass  # pandas trop ancien pour calamine → openpyxl
+    return pd.read_excel(BytesIO(contenu))
+
+
+def _ecrire_cache(df, chemin):
+    if FORMAT_CACHE == "parquet":
+        try:
+            df.to_parquet(chemin, index=False)
+            return
+        except (ValueError, TypeError, ImportError):
+            pass  # colonnes de types mixtes non sérialisables en parquet
+    df.to_pickle(chemin)
+
+
+def ecrire_table(df, chemin):
+    """Écrit ``df`` au format du cache, de façon atomique (fichier temporaire puis remplacement)."""
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    # Fichier temporaire propre au thread : plusieurs traitements peuvent écrire la même table
+    temporaire = f"{chemin}.{os.getpid()}_{threading.get_ident()}.tmp"
+    _ecrire_cache(df, temporaire)
+    os.replace(temporaire, chemin)
+
+
+# Signature des fichiers parquet (4 premiers octets)
+_MAGIC_PARQUET = b"PAR1"
+
+
+def lire_table(chemin):
+    """Relit une table écrite par ``ecrire_table``, avec le lecteur du format écrit."""
+    with open(chemin, "rb") as f:
+        est_parquet = f.read(len(_MAGIC_PARQUET)) == _MAGIC_PARQUET
+    if not est_parquet:
+        return pd.read_pickle(chemin)
+    df = pd.read_parquet(chemin)
+    # parquet restitue les valeurs manquantes texte en None : on revient à NaN
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def lire_avec_cache(source, preparer, version, dossier_cache=CHEMIN_CACHE_SEXTAN, nom=None):
+    """Lit ``source`` et applique ``preparer``, en cache selon le contenu du fichier.
+
+    La clé combine le hash du contenu et ``version`` (à incrémenter quand
+    ``preparer`` change) : un fichier identique n'est ni relu ni nettoyé.
+    """
+    contenu = _contenu(source)
+    if not dossier_cache:
+        return preparer(lire_tableau(source, nom, contenu))
+
+    cle = empreinte_fichier(source, contenu)
+    chemin = os.path.join(dossier_cache, f"{cle}_v{version}")
+    if os.path.exists(chemin):
+        return lire_table(chemin)
+
+    df = preparer(lire_tableau(source, nom, contenu))
+    ecrire_table(df, chemin)
+    return df
+
+
+def _blocs_xlsx(chemin, taille_bloc):
+    # openpyxl en lecture seule : les lignes sont lues au fil de l'eau
+    from openpyxl import load_workbook
+
+    classeur = load_workbook(chemin, read_only=True, data_only=True)
+    try:
+        lignes = classeur.active.iter_rows(values_only=True)
+        entete = next(lignes, None)
+        if entete is None:
+            return
+        colonnes = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(entete)]
+        bloc = []
+        for ligne in lignes:
+            bloc.append(ligne)
+            if len(bloc) == taille_bloc:
+                yield pd.DataFrame(bloc, columns=colonnes)
+                bloc = []
+        if bloc:
+            yield pd.DataFrame(bloc, columns=colonnes)
+    finally:
+        classeur.close()
+
+
+def lire_par_blocs(chemin, taille_bloc):
+    """Lit un fichier xlsx, csv ou parquet par blocs de ``taille_bloc`` lignes."""
+    extension = _extension(chemin)
+    if extension == ".csv":
+        with open(chemin, "rb") as f:
+            sep = _separateur_csv(f.readline())
+        yield from pd.read_csv(chemin, sep=sep, chunksize=taille_bloc)
+    elif extension == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(chemin).iter_batches(batch_size=taille_bloc):
+            yield batch.to_pandas()
+    else:
+        yield from _blocs_xlsx(chemin, taille_bloc)
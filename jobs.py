@@ -0,0 +1,135 @@
+# jobs.py
+#
+# Traitements exécutés en arrière-plan : chaque traitement devient un job
+# soumis à un pool de threads ; l'interface lit son avancement sans bloquer
+# et les traitements de plusieurs opérateurs tournent en même temps.
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from profiling import ProfilRun
+
+logger = logging.getLogger(__name__)
+
+# Nombre de traitements exécutés simultanément
+JOBS_SIMULTANES = 4
+
+# Jobs terminés conservés pour que l'interface puisse s'y reconnecter
+JOBS_CONSERVES = 20
+
+# Étapes de process_files, dans l'ordre (calcul du pourcentage global)
+ETAPES_PIPELINE = (
+    "lecture_sextan", "lecture_izydesk", "preparation", "explode", "prix",
+    "matching", "fusion", "classement", "export",
+)
+
+# Étapes de process_files_incremental
+ETAPES_INCREMENTAL = (
+    "lecture_sextan", "lecture_izydesk", "preparation", "detection", "explode", "prix",
+    "matching", "fusion", "classement", "historique", "export",
+)
+
+EN_ATTENTE, EN_COURS, TERMINE, ERREUR = "en attente", "en cours", "terminé", "erreur"
+
+
+class Job:
+    """État d'un traitement : statut, étape en cours, avancement, résultat ou erreur."""
+
+    def __init__(self, cle, libelle, etapes):
+        self.cle = cle
+        self.libelle = libelle
+        self.etapes = tuple(etapes)
+        self.statut = EN_ATTENTE
+        self.etape = None
+        self.fraction_etape = 0.0
+        self.avancement_etape = None
+        self.resultat = None
+        self.erreur = None
+        self.soumis = time.time()
+        self.termine = None
+        self._verrou = threading.Lock()
+
+    def maj(self, **valeurs):
+        with self._verrou:
+            self.__dict__.update(valeurs)
+
+    @property
+    def fini(self):
+        return self.statut in (TERMINE, ERREUR)
+
+    @property
+    def progression(self):
+        """Avancement global entre 0 et 1 : étapes terminées + fraction de l'étape en cours."""
+        if self.statut == TERMINE:
+            return 1.0
+        if self.etape not in self.etapes:
+            return 0.0
+        return (self.etapes.index(self.etape) + self.fraction_etape) / len(self.etapes)
+
+
+class ProfilJob(ProfilRun):
+    """Profil qui publie l'étape en cours et l'avancement dans le job."""
+
+    def __init__(self, job):
+        # tracemalloc est global au processus : pas de pic fiable entre jobs concurrents (RSS par étape seulement)
+        super().__init__(tracer_memoire=False)
+        self.job = job
+
+    def debut_etape(self, nom):
+        self.job.maj(etape=nom, fraction_etape=0.0, avancement_etape=None)
+
+    def avancement(self, fait, total):
+        self.job.maj(fraction_etape=fait / total if total else 1.0, avancement_etape=(fait, total))
+
+
+class GestionnaireJobs:
+    """Pool de threads partagé par toutes les sessions de l'interface.
+
+    Un job est identifié par une clé (hash du contenu des fichiers) : soumettre
+    deux fois les mêmes fichiers renvoie le job existant, en cours ou terminé.
+    """
+
+    def __init__(self, workers=JOBS_SIMULTANES, conserves=JOBS_CONSERVES):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.conserves = conserves
+        self.jobs = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def soumettre(self, cle, libelle, fonction, *args, etapes=ETAPES_PIPELINE, relancer=False, **kwargs):
+        """Exécute ``fonction(profil, *args, **kwargs)`` en arrière-plan.
+
+        Un job en erreur est renvoyé tel quel pour que l'interface affiche
+        l'erreur ; il n'est relancé qu'avec ``relancer`` (action de l'utilisateur).
+        """
+        with self._verrou:
+            job = self.jobs.get(cle)
+            if job is not None and not (relancer and job.statut == ERREUR):
+                return job
+            job = Job(cle, libelle, etapes)
+            self.jobs[cle] = job
+            self._evincer()
+        self.executor.submit(self._executer, job, fonction, args, kwargs)
+        return job
+
+    def job(self, cle):
+        return self.jobs.get(cle)
+
+    def _executer(self, job, fonction, args, kwargs):
+        job.maj(statut=EN_COURS)
+        profil = ProfilJob(job)
+        try:
+            resultat = fonction(profil, *args, **kwargs)
+        except Exception as e:
+            logger.exception("Job %s en erreur", job.libelle)
+            job.maj(statut=ERREUR, erreur=f"{type(e).__name__} : {e}", termine=time.time())
+        else:
+            job.maj(statut=TERMINE, resultat=resultat, termine=time.time())
+
+    def _evincer(self):
+        # Les plus anciens jobs terminés partent en premier ; un job en cours n'est jamais retiré
+        finis = [cle for cle, job in self.jobs.items() if job.fini]
+        for cle in finis[:max(0, len(self.jobs) - self.conserves)]:
+            del self.jobs[cle]
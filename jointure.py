@@ -0,0 +1,75 @@
+# jointure.py
+#
+# Jointures gauches sur clés entières : les clés texte sont factorisées une
+# fois (codes entiers dans les valeurs distinctes de la table de droite), les
+# lignes de droite sont prises par position. Même résultat que
+# DataFrame.merge(how="left") sans table de hachage sur les chaînes ni copie
+# intermédiaire des deux tables.
+
+import numpy as np
+import pandas as pd
+
+
+def _nulls_uniformes(cles):
+    # merge apparie None et NaN entre eux, factorize / get_indexer non : un seul NaN
+    cles = pd.Series(cles, copy=False)
+    if cles.dtype == object and cles.hasnans:
+        cles = cles.where(cles.notna(), np.nan)
+    return cles
+
+
+def positions_jointure(cles_gauche, cles_droite, premiere=False):
+    """Lignes de gauche et de droite appariées par une jointure gauche (-1 : pas de correspondance à droite).
+
+    Une ligne de gauche est répétée pour chacune de ses correspondances, dans
+    l'ordre de la table de droite ; avec ``premiere``, seule la première est gardée.
+    Les clés manquantes (None, NaN) se correspondent entre elles, comme avec merge.
+    """
+    cles_gauche, cles_droite = _nulls_uniformes(cles_gauche), _nulls_uniformes(cles_droite)
+    codes_droite, uniques = pd.factorize(cles_droite, use_na_sentinel=False)
+    codes_gauche = pd.Index(uniques).get_indexer(cles_gauche)
+    trouve = codes_gauche >= 0
+
+    # Lignes de droite regroupées par code, dans leur ordre d'origine
+    ordre = np.argsort(codes_droite, kind="stable")
+    nb = np.bincount(codes_droite, minlength=len(uniques))
+    debut = np.cumsum(nb) - nb
+
+    if premiere or len(uniques) == len(cles_droite):
+        lignes_gauche = np.arange(len(codes_gauche))
+        lignes_droite = np.where(trouve, ordre[debut[codes_gauche]] if len(ordre) else -1, -1)
+        return lignes_gauche, lignes_droite
+
+    repetitions = np.where(trouve, nb[codes_gauche], 1)
+    lignes_gauche = np.repeat(np.arange(len(codes_gauche)), repetitions)
+    rang = np.arange(len(lignes_gauche)) - np.repeat(np.cumsum(repetitions) - repetitions, repetitions)
+    lignes_droite = np.where(
+        trouve[lignes_gauche], ordre[debut[codes_gauche[lignes_gauche]] + rang], -1
+    )
+    return lignes_gauche, lignes_droite
+
+
+def jointure_gauche(gauche, droite, cle_gauche, cle_droite=None, premiere=False):
+    """Équivalent de ``gauche.merge(droite, left_on=cle_gauche, right_on=cle_droite, how="left")``.
+
+    Colonnes et types identiques (colonnes de droite sans la clé si elle porte
+    le même nom) ; index remis à 0..n-1. Avec ``premiere``, une ligne de
+    gauche ne reçoit que sa première correspondance.
+    """
+    cle_droite = cle_droite or cle_gauche
+    colonnes_droite = droite.columns.drop(cle_droite) if cle_droite == cle_gauche else droite.columns
+    lignes_gauche, lignes_droite = positions_jointure(gauche[cle_gauche], droite[cle_droite], premiere)
+    if len(lignes_gauche) != len(gauche):
+        gauche = gauche.take(lignes_gauche)
+    # reindex : lignes manquantes (-1) à NaN, avec la même promotion de types que merge
+    partie_droite = droite[colonnes_droite].set_axis(pd.RangeIndex(len(droite))).reindex(lignes_droite)
+    partie_droite.index = gauche.index
+
+    # Colonnes présentes des deux côtés : suffixes _x / _y comme merge
+    communes = gauche.columns.intersection(colonnes_droite)
+    if len(communes):
+        gauche = gauche.rename(columns={col: f"{col}_x" for col in communes})
+        partie_droite = partie_droite.rename(columns={col: f"{col}_y" for col in communes})
+    resultat = pd.concat([gauche, partie_droite], axis=1)
+    resultat.index = pd.RangeIndex(len(resultat))
+    return resultat
@@ -0,0 +1,168 @@
+# matching.py
+
+import re
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz as rf_fuzz
+from rapidfuzz import process
+from thefuzz import fuzz
+
+from cache import empreinte_catalogue
+
+# Seuil de correspondance utilisé par find_best_match
+SEUIL_MATCH = 80
+
+# Signaux de score (scorers rapidfuzz) et leurs poids.
+# Ratio seul : mêmes correspondances que find_best_match.
+SIGNAUX_RATIO = {"ratio": 1.0}
+# Combiné : ratio + token_set_ratio (ordre des mots) + partial_ratio (noms tronqués)
+SIGNAUX_COMBINES = {"ratio": 0.5, "token_set_ratio": 0.3, "partial_ratio": 0.2}
+
+# Nombre de candidats gardés par produit (le meilleur et ses suivants)
+NB_CANDIDATS = 3
+
+# Mémoire des matrices de scores d'un lot (octets) : le nombre de produits Izydesk
+# par lot en découle, selon la taille du catalogue
+BUDGET_SCORES = 64 * 1024 * 1024
+
+# Volumes des boissons ("33 cl", "50cl")
+PATTERN_VOLUME = r"\s*(\d{2,3}\s?cl)\b"
+
+
+# --- Recherche exhaustive (référence) ---
+def find_best_match(produit, produits_sextan, seuil=SEUIL_MATCH):
+    best_match = None
+    best_score = 0
+    for prod in produits_sextan:
+        score = fuzz.ratio(produit, prod)
+        if score > best_score and score >= seuil:
+            best_match = prod
+            best_score = score
+    return best_match
+
+
+def normaliser_nom(nom):
+    """Nom sans volume de boisson, pour que "33 cl" ne pèse pas dans le score."""
+    return re.sub(PATTERN_VOLUME, "", nom).strip()
+
+
+# --- Moteur de correspondance par matrices de scores ---
+class MoteurMatching:
+    """Scores de tous les produits du catalogue en une passe (rapidfuzz.process.cdist, en C).
+
+    Chaque signal est arrondi à l'entier comme fuzz.ratio de thefuzz, puis
+    pondéré. Les candidats sont classés par score puis dans l'ordre du
+    catalogue : avec SIGNAUX_RATIO et sans normalisation, le premier candidat
+    est celui de find_best_match. ``normaliser`` retire les volumes des deux
+    côtés avant le score ; les noms retournés restent ceux du catalogue.
+    ``workers`` : threads de cdist (-1 : tous les coeurs ; 1 dans les processus de batch.py).
+
+    Pas de pré-filtre (index n-grammes, borne de longueur) : le second
+    candidat et son score sont exportés même sous le seuil, il faut donc les
+    k meilleurs exacts ; la borne de longueur contre le k-ième score écarte
+    alors moins de la moitié du catalogue, et un appel cdist par groupe de
+    longueurs s'est révélé plus lent qu'une seule matrice complète.
+    """
+
+    def __init__(self, produits_sextan, seuil=SEUIL_MATCH, signaux=SIGNAUX_RATIO, normaliser=False,
+                 nb_candidats=NB_CANDIDATS, workers=-1):
+        self.produits = list(produits_sextan)
+        self.seuil = seuil
+        self.signaux = dict(signaux)
+        self.normaliser = normaliser
+        self.nb_candidats = nb_candidats
+        self.workers = workers
+        # Deux matrices float64 à la fois : le total et le signal en cours
+        self.taille_lot = max(1, BUDGET_SCORES // (2 * 8 * max(len(self.produits), 1)))
+        parametres = {"signaux": self.signaux, "normaliser": normaliser, "nb_candidats": nb_candidats}
+        self.empreinte = empreinte_catalogue(self.produits, seuil, parametres)
+        self._choix = [normaliser_nom(p) for p in self.produits] if normaliser else self.produits
+
+    def scores(self, requetes):
+        """Matrice (requêtes x catalogue) des scores combinés."""
+        if self.normaliser:
+            requetes = [normaliser_nom(r) for r in requetes]
+        total = np.zeros((len(requetes), len(self.produits)))
+        for signal, poids in self.signaux.items():
+            # float64 : arrondi identique à int(round(score)) de thefuzz
+            matrice = process.cdist(requetes, self._choix, scorer=getattr(rf_fuzz, signal), dtype=np.float64,
+                                  workers=self.workers)
+            total += poids * np.rint(matrice)
+        return total
+
+    def candidats(self, requetes):
+        """Pour chaque requête, les ``nb_candidats`` meilleurs (produit, score) de score non nul."""
+        resultats = []
+        k = min(self.nb_candidats, len(self.produits))
+        if k == 0:
+            return [() for _ in requetes]
+        for debut in range(0, len(requetes), self.taille_lot):
+            scores = self.scores(requetes[debut:debut + self.taille_lot])
+            # k-ième meilleur score de chaque ligne, sans trier tout le catalogue
+            partition = np.argpartition(-scores, k - 1, axis=1)[:, k - 1]
+            kiemes = scores[np.arange(len(scores)), partition]
+            for ligne, kieme in zip(scores, kiemes):
+                # Scores au moins égaux au k-ième, triés de façon stable :
+                # à score égal, l'ordre du catalogue départage
+                indices = np.flatnonzero((ligne >= kieme) & (ligne > 0))
+                indices = indices[np.argsort(-ligne[indices], kind="stable")[:k]]
+                resultats.append(tuple((self.produits[i], round(float(ligne[i]), 2)) for i in indices))
+        return resultats
+
+    def retenu(self, candidats):
+        """Correspondance retenue : le meilleur candidat s'il atteint le seuil."""
+        if candidats and candidats[0][1] >= self.seuil:
+            return candidats[0][0]
+        return None
+
+    def best_match(self, produit):
+        return self.retenu(self.candidats([produit])[0])
+
+
+# --- Correspondance sur les noms distincts ---
+def match_produits(produits, moteur, cache=None, memo=None, progression=None):
+    """Cherche les candidats de chaque nom distinct une seule fois.
+
+    Si un MatchCache est fourni, seuls les noms absents du cache pour ce
+    catalogue et ces paramètres passent par le moteur. ``memo`` (dict) garde
+    les résultats en mémoire d'un appel à l'autre (traitement par blocs).
+    ``progression`` (fait, total) est appelée au fil des lots calculés.
+    Retourne un DataFrame aligné sur ``produits`` (produit_match, match_score,
+    match_second, match_second_score) et un dictionnaire de statistiques.
+    """
+    codes, uniques = pd.factorize(produits)
+    trouves = {} if memo is None else memo
+    inconnus = [p for p in uniques if p not in trouves]
+    if cache is not None and inconnus:
+        trouves.update(cache.get_many(inconnus, moteur.empreinte))
+    a_calculer = [p for p in inconnus if p not in trouves]
+    nouveaux = {}
+    for debut in range(0, len(a_calculer), moteur.taille_lot):
+        lot = a_calculer[debut:debut + moteur.taille_lot]
+        nouveaux.update(zip(lot, moteur.candidats(lot)))
+        if progression is not None:
+            progression(len(nouveaux), len(a_calculer))
+    if cache is not None and nouveaux:
+        cache.put_many(nouveaux, moteur.empreinte)
+    trouves.update(nouveaux)
+
+    # Une ligne par nom distinct ; la dernière (code -1, valeurs manquantes) reste vide
+    colonnes = {"produit_match": [], "match_score": [], "match_second": [], "match_second_score": []}
+    for p in uniques:
+        candidats = trouves[p]
+        premier = candidats[0] if candidats else (None, np.nan)
+        second = candidats[1] if len(candidats) > 1 else (None, np.nan)
+        colonnes["produit_match"].append(moteur.retenu(candidats))
+        colonnes["match_score"].append(premier[1])
+        colonnes["match_second"].append(second[0])
+        colonnes["match_second_score"].append(second[1])
+    par_nom = pd.DataFrame(colonnes, index=np.arange(len(uniques))).reindex(np.arange(len(uniques) + 1))
+    par_nom = par_nom.astype({"produit_match": object, "match_second": object})
+    resultat = par_nom.iloc[codes].set_axis(produits.index)
+    stats = {
+        "lignes": len(produits),
+        "produits_distincts": len(uniques),
+        "produits_calcules": len(nouveaux),
+    }
+    return resultat, stats
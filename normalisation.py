@@ -0,0 +1,44 @@
+# normalisation.py
+#
+# Normalisation des textes (minuscules, sans accents) calculée une seule fois
+# par valeur distincte : les colonnes sont factorisées en codes entiers, la
+# fonction n'est appliquée qu'aux valeurs uniques puis redistribuée par code.
+
+from functools import lru_cache
+
+import pandas as pd
+import unidecode
+
+# Formes normalisées gardées en mémoire d'un traitement à l'autre
+TAILLE_MEMO_NORMALISATION = 200_000
+
+
+def par_valeur_unique(serie, fonction):
+    """Applique ``fonction`` (Series -> Series) aux valeurs distinctes puis redistribue sur les lignes."""
+    codes, uniques = pd.factorize(serie, use_na_sentinel=False)
+    valeurs = fonction(pd.Series(uniques, dtype=object))
+    return pd.Series(valeurs.to_numpy()[codes], index=serie.index, dtype=object)
+
+
+@lru_cache(maxsize=TAILLE_MEMO_NORMALISATION)
+def sans_accents(texte):
+    """Texte en minuscules et sans accents, mémorisé."""
+    return unidecode.unidecode(texte.lower())
+
+
+def normaliser(serie):
+    """Forme normalisée de chaque valeur ("" pour les valeurs manquantes), une fois par valeur distincte."""
+    return par_valeur_unique(
+        serie, lambda valeurs: valeurs.map(lambda x: sans_accents(str(x)) if pd.notna(x) else "")
+    )
+
+
+def minuscules(serie):
+    """Textes en minuscules, les autres valeurs inchangées (une fois par valeur distincte)."""
+    resultat = par_valeur_unique(serie, lambda valeurs: valeurs.map(lambda x: x.lower() if isinstance(x, str) else x))
+    return resultat.infer_objects()
+
+
+def nom_normalise(serie):
+    """Nom de produit comparable : texte, minuscules, sans espaces autour (une fois par valeur distincte)."""
+    return par_valeur_unique(serie, lambda valeurs: valeurs.astype(str).str.lower().str.strip())
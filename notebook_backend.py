@@ -3,139 +3,163 @@
 import pandas as pd
 import numpy as np
 import re
-from thefuzz import fuzz
-import unidecode
 import os
-
-# --- Fonction principale ---
-def process_files(path_sextan, path_izydesk):
-
-    # --- 1. Lecture des fichiers ---
-    data_sextan = pd.read_excel(path_sextan)
-    data_izydesk = pd.read_excel(path_izydesk)
-
-    # --- 2. Standardisation colonnes ---
+import glob
+from contextlib import closing
+
+from cache import CHEMIN_CACHE_MATCH, MatchCache
+from corners import catalogue_corner, detecter_corner
+from export import ClasseurIncremental, exporter
+from historique import (
+    CHEMIN_HISTORIQUE,
+    HistoriqueCorner,
+    cles_commandes,
+    commandes_a_traiter,
+    empreintes_commandes,
+    produits_prix_modifies,
+)
+from jointure import jointure_gauche
+from ingestion import (
+    CHEMIN_CACHE_SEXTAN,
+    ecrire_table,
+    empreinte_fichier,
+    lire_avec_cache,
+    lire_par_blocs,
+    lire_table,
+    lire_tableau,
+    nom_source,
+)
+from matching import MoteurMatching, match_produits
+from normalisation import minuscules, nom_normalise, normaliser, par_valeur_unique
+from profiling import ProfilInactif
+from regles import (
+    BOISSONS_COMPILEES,
+    MAPPING_CATEGORIE,
+    REGLES_ANTI_GASPI_COMPILEES,
+    REGLES_CATEGORIE_COMPILEES,
+    REGLES_FAMILLE_COMPILEES,
+    appliquer_regles,
+)
+
+# Clé d'unicité d'une ligne produit de commande
+CLE_LIGNE_COMMANDE = ["id_commande", "date", "heure", "service", "produit"]
+
+
+# Ligne produit Izydesk : "2x Salade César"
+PATTERN_LIGNE_PRODUIT = r"(\d+)x (.+)"
+
+# En-tête de la colonne commande Izydesk : "commandes du 01/01/2024 au 31/01/2024"
+PATTERN_PERIODE = r"commandes du (\d{2})/(\d{2})/(\d{4}) au (\d{2})/(\d{2})/(\d{4})"
+
+# Tables de prix unitaires par corner et période, réutilisées d'un passage à l'autre
+CHEMIN_CACHE_PRIX = "cache/prix"
+
+# Version du calcul des prix unitaires : à incrémenter à chaque modification de table_prix_unitaires
+VERSION_TABLE_PRIX = 1
+
+
+# Version d'origine (ligne à ligne), conservée comme référence (tests/test_explode.py, benchmark.py)
+def extract_products_corrected(df, col_produits="produits"):
+    exploded_sales = []
+    for index, row in df.iterrows():
+        if pd.notna(row[col_produits]):  # Vérifier que la colonne produit n'est pas vide
+            produits = row[col_produits].split("\n")  # Séparer les produits
+            for produit in produits:
+                match = re.match(PATTERN_LIGNE_PRODUIT, produit.strip())  # Extraire la quantité et le nom du produit
+                if match:
+                    qty = int(match.group(1))
+                    product_name = match.group(2).strip()
+                    new_row = row.copy()
+                    new_row["quantité"] = qty
+                    new_row["produit"] = product_name
+                    exploded_sales.append(new_row)
+    return pd.DataFrame(exploded_sales)
+
+
+# Éclatement vectorisé : même résultat que extract_products_corrected
+def explode_produits(df, col_produits="produits"):
+    # Lignes produits indexées par position dans df
+    lignes = pd.Series(df[col_produits].to_numpy(), index=np.arange(len(df))).dropna()
+    lignes = lignes.str.split("\n").explode()
+
+    # Quantité et nom du produit, les lignes non conformes sont écartées
+    extrait = lignes.str.strip().str.extract("^" + PATTERN_LIGNE_PRODUIT).dropna()
+
+    positions = extrait.index.to_numpy()
+    exploded = df.iloc[positions].copy()
+    exploded["quantité"] = extrait[0].astype(np.int64).to_numpy()
+    exploded["produit"] = extrait[1].str.strip().to_numpy()
+    return exploded
+
+
+# Version d'origine (ligne à ligne), conservée comme référence (tests/test_catalogue.py, benchmark.py)
+def split_product_info(value):
+    parts = value.split("|")  # Séparer par "|"
+    parts = [p.strip() for p in parts]  # Nettoyer les espaces
+    categorie = parts[0] if parts else ""
+    produit = ""
+    contenant = ""
+    dlc = ""
+
+    # Identifier les éléments
+    if len(parts) > 1:
+        produit = parts[1]
+
+    if len(parts) > 2:
+        # Essayer de deviner où est le contenant et où est la DLC
+        if "j+" in parts[-1]:  # Vérifie si le dernier élément est une DLC
+            dlc = parts[-1]
+            contenant = " ".join(parts[2:-1])  # Tout le reste est le contenant
+        else:
+            contenant = " ".join(parts[2:])  # Tout est contenant si pas de DLC
+
+    # Si la DLC est collée au contenant, la séparer
+    if contenant and "j+" in contenant:
+        parts = contenant.split()
+        dlc = parts[-1]  # Dernier élément = DLC
+        contenant = " ".join(parts[:-1])  # Tout sauf le dernier = contenant
+
+    return pd.Series([categorie, produit, contenant, dlc])
+
+
+# Découpage vectorisé des noms Sextan "catégorie | produit | contenant | dlc" : même résultat que split_product_info
+def decouper_noms_sextan(noms):
+    parts = noms.fillna("").str.split("|", expand=True).apply(lambda col: col.str.strip())
+    nb_parts = noms.fillna("").str.count(r"\|").to_numpy() + 1
+    valeurs = parts.to_numpy(dtype=object)
+
+    categorie = parts[0]
+    produit = parts[1].fillna("") if parts.shape[1] > 1 else pd.Series("", index=noms.index)
+
+    # Dernier élément = DLC s'il contient "j+" (à partir de 3 éléments)
+    dernier = pd.Series(valeurs[np.arange(len(noms)), nb_parts - 1], index=noms.index)
+    dlc_fin = (nb_parts > 2) & dernier.str.contains("j+", regex=False).to_numpy()
+    dlc = pd.Series(np.where(dlc_fin, dernier, ""), index=noms.index, dtype=object)
+
+    # Contenant : éléments 3 à n (n - 1 si DLC en dernier), séparés par des espaces
+    fin_contenant = np.where(dlc_fin, nb_parts - 1, nb_parts)
+    contenant = pd.Series("", index=noms.index, dtype=object)
+    for j in range(2, parts.shape[1]):
+        inclus = j < fin_contenant
+        contenant = contenant.where(~inclus, parts[j] if j == 2 else contenant + " " + parts[j])
+
+    # DLC collée au contenant : dernier mot du contenant
+    colle = contenant.str.contains("j+", regex=False)
+    if colle.any():
+        mots = contenant[colle].str.split()
+        dlc[colle] = mots.str[-1]
+        contenant[colle] = mots.str[:-1].str.join(" ")
+
+    return pd.DataFrame({0: categorie, 1: produit, 2: contenant, 3: dlc}, index=noms.index)
+
+
+# Version du nettoyage Sextan : à incrémenter à chaque modification de nettoyer_sextan (invalide le cache)
+VERSION_NETTOYAGE_SEXTAN = 3
+
+
+# Nettoyage du catalogue Sextan
+def nettoyer_sextan(data_sextan):
     data_sextan.columns = data_sextan.columns.str.lower()
-    data_izydesk.columns = data_izydesk.columns.str.lower()
-
-    # --- 3. Mapping corners ---
-    corner_mapping = {
-        "toulouse": {"id_corner": "004", "nom_corner": "toulouse"},
-        "garosud": {"id_corner": "001", "nom_corner": "garosud"},
-        "nimes": {"id_corner": "002", "nom_corner": "nimes"},
-        "rochplaza": {"id_corner": "003", "nom_corner": "rochplaza"}
-    }
-    nom_fichier = os.path.basename(path_izydesk).lower()
-    id_corner, nom_corner = "", ""
-    for keyword, values in corner_mapping.items():
-        if keyword in nom_fichier:
-            id_corner = values["id_corner"]
-            nom_corner = values["nom_corner"]
-            data_izydesk["id_corner"] = id_corner
-            data_izydesk["nom corner"] = nom_corner
-            break
-    data_izydesk = data_izydesk[["id_corner", "nom corner"] + [col for col in data_izydesk.columns if col not in ["id_corner", "nom corner"]]]
-
-
-    # Identification de la colonne correspondant au pattern de commande
-    pattern = r"commandes du \d{2}/\d{2}/\d{4} au \d{2}/\d{2}/\d{4}"
-    for col in data_izydesk.columns:
-        if re.match(pattern, col):
-            data_izydesk.rename(columns={col: "id_commande"}, inplace=True)
-            break  # On s'arrête après avoir trouvé la colonne
-        
-    # Vérification et découpage sécurisé
-    data_izydesk[["type paiement", "montant réglé"]] = data_izydesk["paiements"].str.split(":", n = 1, expand = True)
-
-    # Suppression du signe € et conversion en float
-    data_izydesk["montant réglé"] = data_izydesk["montant réglé"].str.replace("€", "", regex=False)
-    data_izydesk["montant réglé"] = pd.to_numeric(data_izydesk["montant réglé"], errors="coerce")
-    # data = data_izydesk.drop(columns = ["paiements"])
-    
-    # Réorganisation des colonnes pour une meilleure lisibilité
-    colonnes = list(data_izydesk.columns)
-    index_paiements = colonnes.index("type paiement")
-    colonnes.insert(index_paiements + 1, colonnes.pop(colonnes.index("montant réglé")))
-    data_izydesk = data_izydesk[colonnes]
-
-    # Parcours du mapping pour trouver la correspondance
-    for keyword, values in corner_mapping.items():
-        if keyword in nom_fichier:
-            data_izydesk["id_corner"] = values["id_corner"]
-            data_izydesk["nom corner"] = values["nom_corner"]
-            break  # On sort dès qu'on trouve le bon corner
-        
-    # Réorganisation des colonnes
-    colonnes = ['id_corner', 'nom corner'] + [col for col in data_izydesk.columns if col not in ['id_corner', 'nom corner']]
-    data_izydesk = data_izydesk[colonnes]
-
-    # Fonction corrigée pour extraire et séparer les produits
-    def extract_products_corrected(df, col_produits="produits"):
-        exploded_sales = []
-        for index, row in df.iterrows():
-            if pd.notna(row[col_produits]):  # Vérifier que la colonne produit n'est pas vide
-                produits = row[col_produits].split("\n")  # Séparer les produits
-                for produit in produits:
-                    match = re.match(r"(\d+)x (.+)", produit.strip())  # Extraire la quantité et le nom du produit
-                    if match:
-                        qty = int(match.group(1))
-                        product_name = match.group(2).strip()
-                        new_row = row.copy()
-                        new_row["quantité"] = qty
-                        new_row["produit"] = product_name
-                        exploded_sales.append(new_row)
-        return pd.DataFrame(exploded_sales)
-
-    # Appliquer la correction
-    data_izydesk = extract_products_corrected(data_izydesk)
-
-    # Identifier les lignes où un seul produit a été commandé dans les données originales
-    data_izydesk_single = data_izydesk[data_izydesk["produits"].str.count("\n") == 0].copy()
-
-    # Extraire le nom et le prix de ces produits uniques
-    def extract_single_product_price(row):
-        match = re.match(r"(\d+)x (.+)", row["produits"].strip())
-        if match:
-            qty = int(match.group(1))
-            product_name = match.group(2).strip()
-            unit_ht = row["ht"] / qty if qty > 0 else row["ht"]
-            unit_ttc = row["ttc"] / qty if qty > 0 else row["ttc"]
-            return product_name, unit_ht, unit_ttc
-        return None, None, None
-
-    # Appliquer la fonction pour extraire les prix unitaires
-    data_izydesk_single[["produit", "ht_unitaire", "ttc_unitaire"]] = data_izydesk_single.apply(
-        lambda row: pd.Series(extract_single_product_price(row)), axis=1
-    )
-
-    # Identifier les produits n'ayant pas pu être extraits correctement (avec valeurs nulles)
-    produits_non_extraits = data_izydesk_single[data_izydesk_single["produit"].isna()][["produits"]].drop_duplicates()
-
-    # Supprimer les lignes avec valeurs nulles pour le DataFrame des prix unitaires
-    df_prix_produits_cleaned = data_izydesk_single.dropna(subset=["produit"])[["produit", "ht_unitaire", "ttc_unitaire"]].drop_duplicates()
-
-    # Supprimer l'ancienne colonne "produits"
-    data_izydesk = data_izydesk.drop(columns=["produits"])
-
-    # Fusionner les données éclatées avec les prix unitaires extraits
-    data_izydesk_corrected = data_izydesk.merge(df_prix_produits_cleaned, on="produit", how="left")
-
-    # Calculer les nouveaux montants HT, TTC et réglés par produit en fonction de la quantité
-    data_izydesk_corrected["ht_total"] = data_izydesk_corrected["ht_unitaire"] * data_izydesk_corrected["quantité"]
-    data_izydesk_corrected["ttc_total"] = data_izydesk_corrected["ttc_unitaire"] * data_izydesk_corrected["quantité"]
-    data_izydesk_corrected["montant réglé total"] = data_izydesk_corrected["ttc_total"]
-    data_izydesk_corrected["ht_unitaire"] = data_izydesk_corrected["ht_unitaire"].round(2)
-    data_izydesk_corrected["ttc_unitaire"] = data_izydesk_corrected["ttc_unitaire"].round(2)
-    data_izydesk_corrected["ht_total"] = data_izydesk_corrected["ht_total"].round(2)
-    data_izydesk_corrected["ttc_total"] = data_izydesk_corrected["ttc_total"].round(2)
-    data_izydesk_corrected["montant réglé total"] = data_izydesk_corrected["montant réglé total"].round(2)
-
-    # Suppression des colonnes redondantes
-    data_izydesk_corrected = data_izydesk_corrected.drop(columns=["ht", "ttc", "montant réglé", "paiements"])
-
-    # produits_sans_prix = data_izydesk_corrected[data_izydesk_corrected["ht_unitaire"].isna()][["produit"]].drop_duplicates()
-
-    data_izydesk = data_izydesk_corrected
 
     pd.options.display.max_colwidth = None
     
@@ -146,10 +170,6 @@ def process_files(path_sextan, path_izydesk):
     print(f"Colonnes à supprimer présentes dans le DataFrame : {colonnes_presentes}")
     data_sextan = data_sextan.drop(columns=colonnes_presentes)
 
-    
-    # data_sextan = data_sextan.drop(columns=["unnamed: 0", "marque", "type", "catégorie", "prod. par", "nb portion", "nb sous-prod.", "stock", "prix ht", "prix ttc", "options"], errors="ignore")
-    data_sextan = data_sextan.drop(columns=["unnamed: 0", "marque", "type", "catégorie", "prod. par", "nb portion", "nb sous-prod.", "stock", "prix ht", "prix ttc", "options"],errors="ignore")
-
     data_sextan = data_sextan.rename(columns={
         "n°": "id_sextan",
         "nom": "produit_sextan",
@@ -167,296 +187,524 @@ def process_files(path_sextan, path_izydesk):
     data_sextan = data_sextan[
         ~data_sextan["famille"].str.contains("ftv|lmf|solanid", case=False, na=False)
     ].reset_index(drop=True)
-    
-    produits_filtres = data_sextan[
-        data_sextan["produit_sextan"].str.contains("solanid|arena", case=False, na=False)
-    ][["produit_sextan"]].drop_duplicates()
+
+    data_sextan[["categorie", "produit_sextan", "contenant", "dlc"]] = decouper_noms_sextan(data_sextan["produit_sextan"])
+
+    # Minuscules, une fois par valeur distincte de chaque colonne texte
+    for col in data_sextan.columns[data_sextan.dtypes == object]:
+        data_sextan[col] = minuscules(data_sextan[col])
+
+    data_sextan["produit_sextan"] = nom_normalise(data_sextan["produit_sextan"])
+    return data_sextan
+
+
+# --- Fonction principale ---
+def process_files(path_sextan, path_izydesk, match_cache_path=CHEMIN_CACHE_MATCH, sextan_cache_dir=CHEMIN_CACHE_SEXTAN,
+                  export_dir="exports", profil=None, export_formats=("xlsx",), exports=None, prix_cache_dir=CHEMIN_CACHE_PRIX,
+                  parametres_matching=None):
+    """``parametres_matching`` (dict facultatif) : paramètres de MoteurMatching (seuil, signaux, normaliser, nb_candidats)."""
+    profil = profil or ProfilInactif()
+
+    # --- 1. Lecture du catalogue Sextan nettoyé (en cache selon son contenu) ---
+    with profil.etape("lecture_sextan") as mesure:
+        data_sextan = charger_sextan(path_sextan, sextan_cache_dir)
+        mesure["lignes_sortie"] = len(data_sextan)
+    return process_izydesk(
+        data_sextan, path_izydesk, match_cache_path, export_dir, profil, export_formats, exports, prix_cache_dir,
+        parametres_matching,
+    )
+
+
+# Variante par blocs de process_files, pour les exports Izydesk volumineux
+def process_files_par_blocs(path_sextan, path_izydesk, taille_bloc=50_000, match_cache_path=CHEMIN_CACHE_MATCH,
+                            sextan_cache_dir=CHEMIN_CACHE_SEXTAN, export_dir="exports", profil=None,
+                            prix_cache_dir=CHEMIN_CACHE_PRIX, parametres_matching=None):
+    profil = profil or ProfilInactif()
+    with profil.etape("lecture_sextan") as mesure:
+        data_sextan = charger_sextan(path_sextan, sextan_cache_dir)
+        mesure["lignes_sortie"] = len(data_sextan)
+    return process_izydesk_par_blocs(
+        data_sextan, path_izydesk, taille_bloc, match_cache_path, export_dir, profil, prix_cache_dir, parametres_matching
+    )
+
+
+# Variante incrémentale de process_files : seules les commandes nouvelles ou modifiées sont traitées
+def process_files_incremental(path_sextan, path_izydesk, match_cache_path=CHEMIN_CACHE_MATCH,
+                              sextan_cache_dir=CHEMIN_CACHE_SEXTAN, historique_dir=CHEMIN_HISTORIQUE,
+                              export_dir="exports", profil=None, export_formats=("xlsx",), exports=None,
+                              prix_cache_dir=CHEMIN_CACHE_PRIX, parametres_matching=None):
+    profil = profil or ProfilInactif()
+    with profil.etape("lecture_sextan") as mesure:
+        data_sextan = charger_sextan(path_sextan, sextan_cache_dir)
+        mesure["lignes_sortie"] = len(data_sextan)
+    return process_izydesk_incremental(
+        data_sextan, path_izydesk, match_cache_path, historique_dir, export_dir, profil, export_formats, exports,
+        prix_cache_dir, parametres_matching,
+    )
 
 
-    def split_product_info(value):
-        parts = value.split("|")  # Séparer par "|"
-        parts = [p.strip() for p in parts]  # Nettoyer les espaces
-        categorie = parts[0] if parts else ""
-        produit = ""
-        contenant = ""
-        dlc = ""
+def charger_sextan(path_sextan, sextan_cache_dir=CHEMIN_CACHE_SEXTAN):
+    return lire_avec_cache(path_sextan, nettoyer_sextan, VERSION_NETTOYAGE_SEXTAN, sextan_cache_dir)
 
-        # Identifier les éléments
-        if len(parts) > 1:
-            produit = parts[1]
 
-        if len(parts) > 2:
-            # Essayer de deviner où est le contenant et où est la DLC
-            if "j+" in parts[-1]:  # Vérifie si le dernier élément est une DLC
-                dlc = parts[-1]
-                contenant = " ".join(parts[2:-1])  # Tout le reste est le contenant
-            else:
-                contenant = " ".join(parts[2:])  # Tout est contenant si pas de DLC
+# Colonnes, corner et paiements des commandes Izydesk (ligne à ligne, utilisable par blocs)
+def preparer_izydesk(data_izydesk, nom_fichier, corner=None):
+    data_izydesk.columns = data_izydesk.columns.str.lower()
+
+    # Corner d'après le registre (corners.json) : contenu du fichier, sinon son nom ; fourni pour les blocs
+    if corner is None:
+        corner = detecter_corner(data_izydesk, nom_fichier)
+    nom_corner = corner["nom_corner"]
+    data_izydesk["id_corner"] = corner["id_corner"]
+    data_izydesk["nom corner"] = nom_corner
 
-        # Si la DLC est collée au contenant, la séparer
-        if contenant and "j+" in contenant:
-            parts = contenant.split()
-            dlc = parts[-1]  # Dernier élément = DLC
-            contenant = " ".join(parts[:-1])  # Tout sauf le dernier = contenant
+    # Identification de la colonne correspondant au pattern de commande
+    for col in data_izydesk.columns:
+        if re.match(PATTERN_PERIODE, col):
+            data_izydesk = data_izydesk.rename(columns={col: "id_commande"})
+            break  # On s'arrête après avoir trouvé la colonne
+
+    # Vérification et découpage sécurisé
+    data_izydesk[["type paiement", "montant réglé"]] = data_izydesk["paiements"].str.split(":", n = 1, expand = True)
 
-        return pd.Series([categorie, produit, contenant, dlc])
+    # Suppression du signe € et conversion en float
+    data_izydesk["montant réglé"] = data_izydesk["montant réglé"].str.replace("€", "", regex=False)
+    data_izydesk["montant réglé"] = pd.to_numeric(data_izydesk["montant réglé"], errors="coerce")
+    # data = data_izydesk.drop(columns = ["paiements"])
+    
+    # Réorganisation des colonnes en une seule sélection : corner en tête, montant réglé après le type de paiement
+    colonnes = [col for col in data_izydesk.columns if col not in ["id_corner", "nom corner"]]
+    colonnes.insert(colonnes.index("type paiement") + 1, colonnes.pop(colonnes.index("montant réglé")))
+    data_izydesk = data_izydesk[["id_corner", "nom corner"] + colonnes]
+
+    return data_izydesk, nom_corner
+
+
+# Table des prix unitaires, d'après les commandes d'un seul produit
+def table_prix_unitaires(data_izydesk):
+    # Commandes d'un seul produit : quantité et nom déjà extraits par l'éclatement
+    data_izydesk_single = data_izydesk[data_izydesk["produits"].str.count("\n") == 0]
+    if data_izydesk_single.empty:
+        return pd.DataFrame({"produit": pd.Series(dtype=object), "ht_unitaire": pd.Series(dtype=float), "ttc_unitaire": pd.Series(dtype=float)})
+
+    # Prix unitaire = montant / quantité (montant tel quel pour une quantité nulle)
+    quantite = data_izydesk_single["quantité"]
+    diviseur = quantite.where(quantite > 0, 1)
+    df_prix_produits = pd.DataFrame({
+        "produit": data_izydesk_single["produit"],
+        "ht_unitaire": data_izydesk_single["ht"] / diviseur,
+        "ttc_unitaire": data_izydesk_single["ttc"] / diviseur,
+    })
+
+    # Supprimer les lignes sans produit et les doublons
+    df_prix_produits_cleaned = df_prix_produits.dropna(subset=["produit"]).drop_duplicates()
+    return df_prix_produits_cleaned
+
+
+# Période de l'export ("aaaammjj-aaaammjj"), d'après l'en-tête de la colonne commande
+def periode_izydesk(colonnes):
+    for col in colonnes:
+        match = re.match(PATTERN_PERIODE, str(col).lower())
+        if match:
+            jour_debut, mois_debut, annee_debut, jour_fin, mois_fin, annee_fin = match.groups()
+            return f"{annee_debut}{mois_debut}{jour_debut}-{annee_fin}{mois_fin}{jour_fin}"
+    return "periode_inconnue"
+
+
+# Table des prix unitaires d'un corner et d'une période, relue si le même export a déjà été traité.
+# Une seule table gardée par corner et période : celle du dernier export traité.
+def charger_table_prix(calculer, prix_cache_dir, nom_corner, periode, path_izydesk):
+    if not prix_cache_dir:
+        return calculer()
+    prefixe = os.path.join(prix_cache_dir, f"{nom_corner}_{periode}_")
+    chemin = f"{prefixe}{empreinte_fichier(path_izydesk)[:16]}_v{VERSION_TABLE_PRIX}"
+    if os.path.exists(chemin):
+        return lire_table(chemin)
+    df_prix_produits_cleaned = calculer()
+    ecrire_table(df_prix_produits_cleaned, chemin)
+    # Tables des exports précédents (ou d'une ancienne version) de la même période, hors écritures en cours
+    for ancien in glob.glob(f"{glob.escape(prefixe)}*_v*"):
+        if ancien != chemin and not ancien.endswith(".tmp"):
+            try:
+                os.remove(ancien)
+            except OSError:
+                pass
+    return df_prix_produits_cleaned
+
+
+# Montants par produit d'après la table des prix unitaires
+def appliquer_prix(data_izydesk, df_prix_produits_cleaned):
+    # Supprimer l'ancienne colonne "produits" et les montants de la commande (remplacés par les montants par produit)
+    data_izydesk = data_izydesk.drop(columns=["produits", "ht", "ttc", "montant réglé", "paiements"])
+
+    # Fusionner les données éclatées avec les prix unitaires extraits (jointure sur codes entiers)
+    data_izydesk_corrected = jointure_gauche(data_izydesk, df_prix_produits_cleaned, "produit")
+
+    # Calculer les nouveaux montants HT, TTC et réglés par produit en fonction de la quantité
+    data_izydesk_corrected["ht_total"] = data_izydesk_corrected["ht_unitaire"] * data_izydesk_corrected["quantité"]
+    data_izydesk_corrected["ttc_total"] = data_izydesk_corrected["ttc_unitaire"] * data_izydesk_corrected["quantité"]
+    data_izydesk_corrected["montant réglé total"] = data_izydesk_corrected["ttc_total"]
+    data_izydesk_corrected["ht_unitaire"] = data_izydesk_corrected["ht_unitaire"].round(2)
+    data_izydesk_corrected["ttc_unitaire"] = data_izydesk_corrected["ttc_unitaire"].round(2)
+    data_izydesk_corrected["ht_total"] = data_izydesk_corrected["ht_total"].round(2)
+    data_izydesk_corrected["ttc_total"] = data_izydesk_corrected["ttc_total"].round(2)
+    data_izydesk_corrected["montant réglé total"] = data_izydesk_corrected["montant réglé total"].round(2)
+    return data_izydesk_corrected
 
-    data_sextan[["categorie", "produit_sextan", "contenant", "dlc"]] = data_sextan["produit_sextan"].apply(split_product_info)
 
-    data_sextan = data_sextan.applymap(lambda x: x.lower() if isinstance(x, str) else x)
+# Moteur de correspondance sur les produits du catalogue Sextan
+def moteur_matching(data_sextan, parametres_matching=None):
+    return MoteurMatching(data_sextan["produit_sextan"].unique(), **(parametres_matching or {}))
 
 
+# Correspondance des produits Izydesk avec le catalogue Sextan
+def matcher_produits(data_izydesk, moteur, match_cache=None, memo=None, progression=None):
     # Normaliser les colonnes produit pour minimiser les différences de casse et d'orthographe
-    data_izydesk["produit"] = data_izydesk["produit"].astype(str).str.lower().str.strip()
-    data_sextan["produit_sextan"] = data_sextan["produit_sextan"].astype(str).str.lower().str.strip()
-
-    # Optimisation en limitant les comparaisons
-    def find_best_match(produit, produits_sextan):
-        best_match = None
-        best_score = 0
-        for prod in produits_sextan:
-            score = fuzz.ratio(produit, prod)
-            if score > best_score and score >= 80:
-                best_match = prod
-                best_score = score
-        return best_match
-
-    # Appliquer la correspondance avec une approche optimisée - 2mmin 12
-    produits_sextan_list = data_sextan["produit_sextan"].unique()
-    data_izydesk["produit_match"] = data_izydesk["produit"].apply(lambda x: find_best_match(x, produits_sextan_list))
+    data_izydesk["produit"] = nom_normalise(data_izydesk["produit"])
+
+    # Candidats du catalogue (score et second candidat exportés), une fois par nom distinct
+    correspondances, stats_match = match_produits(data_izydesk["produit"], moteur, match_cache, memo, progression)
+    data_izydesk[correspondances.columns] = correspondances
+    print(
+        f"Correspondance : {stats_match['produits_distincts']} produits distincts pour {stats_match['lignes']} lignes, "
+        f"{stats_match['produits_calcules']} calculés (hors cache)"
+    )
 
     # Remplacer NaN dans 'produit_match' par la valeur de 'produit'
-    data_izydesk["produit_match"] = data_izydesk.apply(
-        lambda row: row["produit"] if pd.isna(row["produit_match"]) else row["produit_match"], axis=1
+    data_izydesk["produit_match"] = data_izydesk["produit_match"].where(
+        data_izydesk["produit_match"].notna(), data_izydesk["produit"]
     )
 
     # Suppression des volumes dans les boissons
     data_izydesk["produit_match"] = data_izydesk["produit_match"].str.replace(r'\s*(\d{2,3}\s?cl)\b', '', regex=True).str.strip()
+    return data_izydesk
 
-    # Afficher les lignes où le produit d'origine contenait 'pepsi max'
-    verif_pepsi = data_izydesk[data_izydesk["produit"].str.contains("pepsi max", case=False, na=False)]
 
-    # Lignes où produit_match a été modifié (différent du produit d'origine)
-    modifs = data_izydesk[data_izydesk["produit"] != data_izydesk["produit_match"]][["produit", "produit_match"]]
-
-    # Fusionner les DataFrames
+# Version d'origine (merge, remplacement ligne à ligne puis suppression des doublons), conservée comme référence (tests/test_jointure.py, benchmark.py)
+def fusionner_sextan_merge(data_izydesk, data_sextan):
     merged_data = data_izydesk.merge(
         data_sextan, left_on="produit_match", right_on="produit_sextan", how="left"
     )
-
-    # Remplacer les NaN dans 'produit_sextan' par la valeur de 'produit_match'
     merged_data["produit_sextan"] = merged_data.apply(
         lambda row: row["produit_match"] if pd.isna(row["produit_sextan"]) else row["produit_sextan"], axis=1
     )
+    merged_data["produit_sextan_trouve"] = merged_data["produit_sextan"].notna()
+    merged_data.drop(columns=["produit_match"], inplace=True)
+    return merged_data.drop_duplicates(subset=CLE_LIGNE_COMMANDE, keep="first").reset_index(drop=True)
+
+
+# Jointure avec le catalogue Sextan, sans doublons de lignes de commande
+def fusionner_sextan(data_izydesk, data_sextan):
+    # Suppression des doublons en conservant la première occurrence, avant la jointure
+    doublons = data_izydesk.duplicated(subset=CLE_LIGNE_COMMANDE, keep="first")
+    if doublons.any():
+        data_izydesk = data_izydesk[~doublons]
+
+    # Fusionner les DataFrames : première fiche Sextan du nom (comme merge puis suppression des doublons)
+    merged_data = jointure_gauche(data_izydesk, data_sextan, "produit_match", "produit_sextan", premiere=True)
+
+    # Remplacer les NaN dans 'produit_sextan' par la valeur de 'produit_match' (colonne temporaire retirée)
+    produit_match = merged_data.pop("produit_match")
+    merged_data["produit_sextan"] = merged_data["produit_sextan"].where(merged_data["produit_sextan"].notna(), produit_match)
 
     # Créer une colonne pour indiquer si le produit existe ou non dans Sextan
     merged_data["produit_sextan_trouve"] = merged_data["produit_sextan"].notna()
     # Maintenant, merged_data a un booléen True/False qui montre la correspondance
+    return merged_data
 
-    # Suppression de la colonne de correspondance temporaire
-    merged_data.drop(columns=["produit_match"], inplace=True)
 
-    # Suppression des doublons en conservant la première occurrence
-    merged_data_cleaned = merged_data.drop_duplicates(subset=["id_commande", "date", "heure", "service", "produit"], keep="first").reset_index(drop=True)
+# Familles et catégories (règles de regles.py)
+def classer_familles(merged_data):
+    # Attribution de familles si NaN : règles évaluées une fois par produit Sextan distinct
+    def famille_par_regles(produits):
+        familles = appliquer_regles(normaliser(produits), REGLES_FAMILLE_COMPILEES)
+        # Sinon → nom du produit Sextan
+        return familles.where(familles.notna(), produits)
 
-    merged_data = merged_data_cleaned
-    
-    # Attribution de familles si NaN
-
-    # Nettoyage pour homogénéiser
-    merged_data["produit_sextan_clean"] = merged_data["produit_sextan"].apply(lambda x: unidecode.unidecode(x.lower()) if isinstance(x, str) else "")
-
-    # Fonction pour attribuer la famille
-    def attribuer_famille(row):
-        produit = row["produit_sextan_clean"]
-
-        # Si famille déjà remplie → on garde
-        if pd.notna(row["famille"]):
-            return row["famille"]
-
-        # 1️⃣ Condition spéciale : tout ce qui contient "offert", "offre", "1 acheté"
-        if re.search(r'offert|offre|1.*achete', produit):
-            return "offre"
-
-        # 2️⃣ Produits boissons doivent retourner leur propre nom sans volume
-        if re.search(r'\b(pepsi max|pepsi|ice tea peche)\b', produit):
-            return produit.strip()
-
-        # 3️⃣ Muffin → dessert muffin
-        if "muffin" in produit:
-            return "dessert muffin"
-
-        # 4️⃣ Cookie → dessert cookie
-        if "cookie" in produit:
-            return "dessert cookie"
-
-        # 5️⃣ Brownie → dessert brownie
-        if "brownie" in produit:
-            return "dessert brownie"
-        
-        # 5️⃣ sojasun → dessert yaourt
-        if re.search(r'sojasun|yaourt', produit):
-            return "dessert yaourt"
-        
-        # 5️⃣ galette des rois / frangipane → dessert part de cake
-        if re.search(r'frangipane|galette|gateau|buche', produit):
-            return "dessert part de cake"
-
-        # 6️⃣ Produits contenant "salade" ou "bowl" → trefle salade
-        if re.search(r'salade|bowl', produit):
-            return "trefle salade"
-        
-        # 6️⃣ Produits contenant "porc" → trefle porc
-        if re.search(r'porc', produit):
-            return "trefle porc"
-
-        # 7️⃣ Verre de vin rouge
-        if "verre de vin rouge" in produit:
-            return "vin"
-
-        # 8️⃣ Kit couverts inox
-        if "kit couverts inox" in produit:
-            return "kit couverts"
-
-        # 9️⃣ gateaux
-        if re.search(r'gateau', produit):
-            return "dessert part de cake"
-
-        # 9️⃣ Pain
-        if re.search(r'pain individuel|petit pain|pain de la veille', produit):
-            return "pain"
-        
-        if "pain polaire" in produit:
-            return "snack"
-
-        # 10️⃣ Anti-gaspi
-        if "anti-gaspi" in produit:
-            return "anti-gaspi"
-        
-        if "sac kraft" in produit:
-            return "autre"
-
-        # 11️⃣ Pizza, focaccia, petites faims → snack
-        if re.search(r'pizza|focaccia|petites faims|pain polaire', produit):
-            return "snack"
-
-        # 12️⃣ Menu ou "+"
-        if ("menu" in produit) or (("+" in produit) and not re.search(r'2 \+ 1', produit)):
-            return "menu"
-
-        # 13️⃣ Produit compte
-        if "compte" in produit:
-            return "produit compte"
-
-        # Sinon → autre
-        return row["produit_sextan"]
-
-    # Application
-    merged_data["famille"] = merged_data.apply(attribuer_famille, axis = 1)
-
-    # Nettoyage colonne temporaire
-    merged_data.drop(columns=["produit_sextan_clean"], inplace = True)
+    familles_regles = par_valeur_unique(merged_data["produit_sextan"], famille_par_regles)
+    merged_data["famille"] = merged_data["famille"].where(merged_data["famille"].notna(), familles_regles)
 
     # Convertir en string pour éviter les types mixtes (NaN souvent pose problème)
     merged_data["categorie"] = merged_data["categorie"].astype(str)
 
-    # Nettoyage
-    merged_data["produit_sextan_clean"] = merged_data["produit_sextan"].apply(lambda x: unidecode.unidecode(str(x).lower()) if pd.notna(x) else "")
-    merged_data["famille_clean"] = merged_data["famille"].apply(lambda x: unidecode.unidecode(str(x).lower()) if pd.notna(x) else "")
-
     ### 1️⃣ Remplacement des catégories numériques
-    mapping_categorie = {
-        1: "entree",
-        2: "plat",
-        3: "dessert",
-        "1.0": "entree",
-        "2.0": "plat",
-        "3.0": "dessert",
-        "1": "entree",
-        "2": "plat",
-        "3": "dessert"
-    }
-    merged_data["categorie"] = merged_data["categorie"].replace(mapping_categorie)
-
-    # Boissons via famille
-    merged_data.loc[
-        merged_data["famille_clean"].str.contains(r'pepsi|max|coca|ice tea|orangina|cristaline|badoit|eau|vin|schweppes|jus|the|boisson|cafe|minute maid|tropicana'),
-        "categorie"
-    ] = "boisson"
-
-    # Nettoyage pour être sûr (mise en minuscule, suppression accents)
-    merged_data["produit_clean"] = merged_data["produit"].apply(lambda x: unidecode.unidecode(str(x).lower()) if pd.notna(x) else "")
-
-    # Appliquer les règles spécifiques anti-gaspi
-    merged_data.loc[
-        (merged_data["produit_clean"].str.contains(r"gaspi|anti-gaspi")) & 
-        (merged_data["produit_clean"].str.contains(r"dessert|desserts")), 
-        "famille"
-    ] = "dessert"
-
-    merged_data.loc[
-        (merged_data["produit_clean"].str.contains(r"gaspi|anti-gaspi")) & 
-        (merged_data["produit_clean"].str.contains(r"plat|plats")), 
-        "famille"
-    ] = "plat"
-
-    merged_data.loc[
-        (merged_data["produit_clean"].str.contains(r"gaspi|anti-gaspi")) & 
-        (~merged_data["produit_clean"].str.contains("dessert|plat")), 
-        "famille"
-    ] = "anti-gaspi autre"
-
-    # Optionnel : suppression colonne temporaire
-    merged_data.drop(columns=["produit_clean"], inplace=True)
-
-    # ✅ RECREATION DE FAMILLE_CLEAN après modif famille
-    merged_data["famille_clean"] = merged_data["famille"].apply(lambda x: unidecode.unidecode(str(x).lower()) if pd.notna(x) else "")
-
-    # Attribution des catégories
-    merged_data.loc[merged_data["famille_clean"].str.contains(r'muffin'), "categorie"] = "dessert muffin"
-    merged_data.loc[merged_data["famille_clean"].str.contains(r'cookie'), "categorie"] = "dessert cookie"
-    merged_data.loc[merged_data["famille_clean"].str.contains(r'brownie'), "categorie"] = "dessert brownie"
-    merged_data.loc[merged_data["famille_clean"].str.contains(r'fruit|dessert'), "categorie"] = "dessert"
-    merged_data.loc[merged_data["famille_clean"].str.contains(r'snack|petite faim'), "categorie"] = "snack"
-    merged_data.loc[merged_data["famille_clean"].str.contains(r'offre|event|menu|compte|pain|autre'), "categorie"] = "autre"
-
-    # Salades & bowls
-    merged_data.loc[merged_data["famille_clean"].str.contains(r'salade|bowl|porc|plat'), "categorie"] = "plat"
-
-    # Kits couverts
-    merged_data.loc[merged_data["famille_clean"].str.contains(r'kit couverts'), "categorie"] = "kit couverts"
-
-    # Cas spécifique anti-gaspi autre
-    merged_data.loc[
-        merged_data["famille"].str.lower() == "anti-gaspi autre",
-        "categorie"
-    ] = "autre"
-
-    # Règle spécifique : dessert gourmand pot transparent thermo
-    merged_data.loc[
-        merged_data["famille_clean"] == "dessert gourmand pot transparent thermo",
-        "categorie"
-    ] = "dessert"
-
-    ### 3️⃣ Vérification sur produit_sextan_clean pour les boissons (au cas où famille serait vide)
-    boissons_keywords = r'pepsi|max|coca|ice tea|orangina|cristaline|badoit|eau|vin|schweppes|jus|the|boisson|cafe|minute maid|tropicana'
-    merged_data.loc[
-        merged_data["categorie"].isna() &
-        merged_data["produit_sextan_clean"].str.contains(boissons_keywords),
-        "categorie"
-    ] = "boisson"
+    merged_data["categorie"] = merged_data["categorie"].replace(MAPPING_CATEGORIE)
+
+    # Appliquer les règles spécifiques anti-gaspi (d'après le produit Izydesk)
+    familles_anti_gaspi = par_valeur_unique(
+        merged_data["produit"], lambda produits: appliquer_regles(normaliser(produits), REGLES_ANTI_GASPI_COMPILEES)
+    )
+    merged_data["famille"] = familles_anti_gaspi.where(familles_anti_gaspi.notna(), merged_data["famille"])
+
+    ### 2️⃣ Attribution des catégories d'après la famille
+    categories = par_valeur_unique(
+        merged_data["famille"], lambda familles: appliquer_regles(normaliser(familles), REGLES_CATEGORIE_COMPILEES)
+    )
+    merged_data["categorie"] = categories.where(categories.notna(), merged_data["categorie"])
+
+    ### 3️⃣ Vérification sur produit_sextan pour les boissons (au cas où la catégorie serait vide)
+    sans_categorie = merged_data["categorie"].isna()
+    if sans_categorie.any():
+        boissons = par_valeur_unique(
+            merged_data.loc[sans_categorie, "produit_sextan"],
+            lambda produits: appliquer_regles(normaliser(produits), BOISSONS_COMPILEES),
+        )
+        merged_data.loc[sans_categorie, "categorie"] = boissons
 
     ### 4️⃣ Fallback : tout ce qui reste → "autre"
     merged_data["categorie"] = merged_data["categorie"].fillna("autre")
-
-    # Nettoyage colonnes temporaires
-    merged_data.drop(columns=["produit_sextan_clean", "famille_clean"], inplace=True)
+    return merged_data
+
+
+# --- Traitement d'un fichier Izydesk (un corner) avec un catalogue Sextan déjà nettoyé ---
+def process_izydesk(data_sextan, path_izydesk, match_cache_path=CHEMIN_CACHE_MATCH, export_dir="exports", profil=None,
+                    export_formats=("xlsx",), exports=None, prix_cache_dir=CHEMIN_CACHE_PRIX, parametres_matching=None):
+    """``exports`` (dict facultatif) reçoit les chemins écrits : {"izydesk": {format: chemin}, "merged": ...}."""
+    profil = profil or ProfilInactif()
+
+    # --- 1. Lecture et préparation du fichier Izydesk ---
+    with profil.etape("lecture_izydesk") as mesure:
+        data_izydesk = lire_tableau(path_izydesk)
+        periode = periode_izydesk(data_izydesk.columns)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    with profil.etape("preparation", len(data_izydesk)) as mesure:
+        data_izydesk, nom_corner = preparer_izydesk(data_izydesk, nom_source(path_izydesk))
+        data_sextan = catalogue_corner(data_sextan, nom_corner)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    # Éclatement des produits : une ligne par produit commandé
+    with profil.etape("explode", len(data_izydesk)) as mesure:
+        data_izydesk = explode_produits(data_izydesk)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    # Prix unitaires (table du corner et de la période) et montants par produit
+    with profil.etape("prix", len(data_izydesk)) as mesure:
+        df_prix_produits_cleaned = charger_table_prix(
+            lambda: table_prix_unitaires(data_izydesk), prix_cache_dir, nom_corner, periode, path_izydesk
+        )
+        data_izydesk = appliquer_prix(data_izydesk, df_prix_produits_cleaned)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    # Correspondance avec le catalogue Sextan
+    with profil.etape("matching", len(data_izydesk)) as mesure:
+        moteur = moteur_matching(data_sextan, parametres_matching)
+        match_cache = MatchCache(match_cache_path) if match_cache_path else None
+        data_izydesk = matcher_produits(data_izydesk, moteur, match_cache, progression=profil.avancement)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    with profil.etape("fusion", len(data_izydesk)) as mesure:
+        merged_data = fusionner_sextan(data_izydesk, data_sextan)
+        mesure["lignes_sortie"] = len(merged_data)
+
+    with profil.etape("classement", len(merged_data)) as mesure:
+        merged_data = classer_familles(merged_data)
+        mesure["lignes_sortie"] = len(merged_data)
 
     # --- 11. Export ---
-    nom_export_izydesk = f"exports/izydesk_auto_{nom_corner}.xlsx"
-    nom_export_merged = f"exports/merged_data_auto_{nom_corner}.xlsx"
+    with profil.etape("export", len(data_izydesk) + len(merged_data)):
+        chemins_izydesk = exporter(data_izydesk, f"izydesk_auto_{nom_corner}", export_dir, export_formats)
+        chemins_merged = exporter(merged_data, f"merged_data_auto_{nom_corner}", export_dir, export_formats)
+        if exports is not None:
+            exports.update(izydesk=chemins_izydesk, merged=chemins_merged)
+
+    return data_izydesk, merged_data
 
-    data_izydesk.to_excel(nom_export_izydesk, index=False)
-    merged_data.to_excel(nom_export_merged, index=False)
+
+# --- Traitement par blocs (exports Izydesk de plusieurs mois) ---
+def process_izydesk_par_blocs(data_sextan, path_izydesk, taille_bloc=50_000, match_cache_path=CHEMIN_CACHE_MATCH,
+                              export_dir="exports", profil=None, prix_cache_dir=CHEMIN_CACHE_PRIX, parametres_matching=None):
+    """Traite un fichier Izydesk bloc par bloc, exports écrits au fil de l'eau.
+
+    Seules restent en mémoire les tables de référence : catalogue Sextan,
+    prix unitaires, correspondances déjà calculées et empreintes des lignes
+    déjà exportées (doublons entre blocs). Retourne les chemins des exports.
+    """
+    profil = profil or ProfilInactif()
+
+    # Passe 1 : table des prix unitaires, calculée sur tout le fichier (sautée si déjà en cache)
+    def passe_prix():
+        df_prix = None
+        with closing(lire_par_blocs(path_izydesk, taille_bloc)) as blocs:
+            for bloc in blocs:
+                bloc, _ = preparer_izydesk(bloc, path_izydesk, corner)
+                prix_bloc = table_prix_unitaires(explode_produits(bloc))
+                df_prix = pd.concat([df_prix, prix_bloc]).drop_duplicates()
+        return df_prix
+
+    with profil.etape("prix") as mesure:
+        # Corner (détecté une seule fois pour tous les blocs) et période d'après le premier bloc
+        with closing(lire_par_blocs(path_izydesk, taille_bloc)) as blocs:
+            premier_bloc = next(blocs, None)
+        corner = None
+        if premier_bloc is None:
+            df_prix_produits_cleaned = None
+        else:
+            periode = periode_izydesk(premier_bloc.columns)
+            premier_bloc.columns = premier_bloc.columns.str.lower()
+            corner = detecter_corner(premier_bloc, path_izydesk)
+            nom_corner = corner["nom_corner"]
+            data_sextan = catalogue_corner(data_sextan, nom_corner)
+            df_prix_produits_cleaned = charger_table_prix(passe_prix, prix_cache_dir, nom_corner, periode, path_izydesk)
+        mesure["lignes_sortie"] = 0 if df_prix_produits_cleaned is None else len(df_prix_produits_cleaned)
+
+    # Passe 2 : éclatement, correspondance, fusion et classement bloc par bloc
+    moteur = moteur_matching(data_sextan, parametres_matching)
+    match_cache = MatchCache(match_cache_path) if match_cache_path else None
+    memo = {}
+    cles_vues = np.array([], dtype=np.uint64)
+    export_izydesk = export_merged = None
+    try:
+        with closing(lire_par_blocs(path_izydesk, taille_bloc)) as blocs:
+            for i, bloc in enumerate(blocs):
+                with profil.etape(f"bloc_{i}", len(bloc)) as mesure:
+                    bloc, nom_corner = preparer_izydesk(bloc, path_izydesk, corner)
+                    data_izydesk = appliquer_prix(explode_produits(bloc), df_prix_produits_cleaned)
+                    data_izydesk = matcher_produits(data_izydesk, moteur, match_cache, memo, profil.avancement)
+                    merged_data = fusionner_sextan(data_izydesk, data_sextan)
+
+                    # Doublons avec les blocs déjà exportés (ceux du bloc sont retirés par fusionner_sextan)
+                    cles = pd.util.hash_pandas_object(merged_data[CLE_LIGNE_COMMANDE], index=False).to_numpy()
+                    nouvelles = ~np.isin(cles, cles_vues)
+                    merged_data = merged_data[nouvelles].reset_index(drop=True)
+                    cles_vues = np.union1d(cles_vues, cles[nouvelles])
+
+                    merged_data = classer_familles(merged_data)
+
+                    if export_izydesk is None:
+                        export_izydesk = ClasseurIncremental(os.path.join(export_dir, f"izydesk_auto_{nom_corner}.xlsx"))
+                        export_merged = ClasseurIncremental(os.path.join(export_dir, f"merged_data_auto_{nom_corner}.xlsx"))
+                    export_izydesk.ajouter(data_izydesk)
+                    export_merged.ajouter(merged_data)
+                    mesure["lignes_sortie"] = len(merged_data)
+    finally:
+        if export_izydesk is not None:
+            export_izydesk.fermer()
+            export_merged.fermer()
+
+    if export_izydesk is None:
+        return None, None
+    return export_izydesk.chemin, export_merged.chemin
+
+
+# Éclatement, prix, correspondance et fusion des seules commandes à traiter
+def _traiter_commandes(data_izydesk, df_prix_produits_cleaned, data_sextan, moteur, match_cache_path, profil):
+    with profil.etape("explode", len(data_izydesk)) as mesure:
+        data_izydesk = explode_produits(data_izydesk)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    with profil.etape("prix", len(data_izydesk)) as mesure:
+        data_izydesk = appliquer_prix(data_izydesk, df_prix_produits_cleaned)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    with profil.etape("matching", len(data_izydesk)) as mesure:
+        match_cache = MatchCache(match_cache_path) if match_cache_path else None
+        data_izydesk = matcher_produits(data_izydesk, moteur, match_cache, progression=profil.avancement)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    with profil.etape("fusion", len(data_izydesk)) as mesure:
+        merged_data = fusionner_sextan(data_izydesk, data_sextan)
+        mesure["lignes_sortie"] = len(merged_data)
+    return data_izydesk, merged_data
+
+
+# --- Traitement incrémental (exports Izydesk cumulatifs d'un mois sur l'autre) ---
+def process_izydesk_incremental(data_sextan, path_izydesk, match_cache_path=CHEMIN_CACHE_MATCH,
+                                historique_dir=CHEMIN_HISTORIQUE, export_dir="exports", profil=None,
+                                export_formats=("xlsx",), exports=None, prix_cache_dir=CHEMIN_CACHE_PRIX,
+                                parametres_matching=None):
+    """Comme process_izydesk, mais seules les commandes absentes de l'historique du
+    corner ou modifiées depuis sont éclatées, mises en correspondance et classées.
+
+    Les résultats sont ajoutés à l'historique (historique.py) et les exports
+    contiennent tout l'historique. Les lignes d'une commande modifiée, ou dont
+    un produit a changé de prix unitaire, sont remplacées ; un historique
+    produit avec un autre catalogue Sextan est ignoré.
+    """
+    profil = profil or ProfilInactif()
+
+    # --- 1. Lecture et préparation du fichier Izydesk ---
+    with profil.etape("lecture_izydesk") as mesure:
+        data_izydesk = lire_tableau(path_izydesk)
+        periode = periode_izydesk(data_izydesk.columns)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    with profil.etape("preparation", len(data_izydesk)) as mesure:
+        data_izydesk, nom_corner = preparer_izydesk(data_izydesk, nom_source(path_izydesk))
+        data_sextan = catalogue_corner(data_sextan, nom_corner)
+        mesure["lignes_sortie"] = len(data_izydesk)
+
+    # Historique du corner : lu, complété et réécrit par un seul traitement à la fois
+    historique = HistoriqueCorner(nom_corner, historique_dir)
+    with historique.verrou():
+        # Commandes nouvelles ou modifiées par rapport à l'historique du corner
+        with profil.etape("detection", len(data_izydesk)) as mesure:
+            moteur = moteur_matching(data_sextan, parametres_matching)
+            anciens = historique.charger(moteur.empreinte)
+            izydesk_historique, merged_historique, commandes_historique, prix_historique = anciens or (None,) * 4
+
+            commandes = empreintes_commandes(data_izydesk)
+            nouvelles, modifiees = commandes_a_traiter(commandes, commandes_historique)
+            cles = cles_commandes(data_izydesk)
+            a_traiter = np.isin(cles, np.concatenate([nouvelles, modifiees]))
+
+            # Prix unitaires d'après les commandes d'un seul produit de tout le fichier
+            un_produit = data_izydesk["produits"].str.count("\n") == 0
+            df_prix_produits_cleaned = charger_table_prix(
+                lambda: table_prix_unitaires(explode_produits(data_izydesk[un_produit])),
+                prix_cache_dir, nom_corner, periode, path_izydesk,
+            )
+
+            # Commandes déjà traitées contenant un produit dont le prix unitaire a changé : à retraiter
+            produits_prix = produits_prix_modifies(df_prix_produits_cleaned, prix_historique)
+            if len(produits_prix):
+                connues = explode_produits(data_izydesk[~a_traiter])
+                a_recalculer = np.unique(cles_commandes(connues[connues["produit"].isin(produits_prix)]))
+                modifiees = np.union1d(modifiees, a_recalculer)
+                a_traiter |= np.isin(cles, a_recalculer)
+
+            data_izydesk = data_izydesk[a_traiter]
+            print(f"Incrémental : {len(nouvelles)} commandes nouvelles, {len(modifiees)} modifiées sur {len(commandes)}")
+            mesure["lignes_sortie"] = len(data_izydesk)
+
+        if data_izydesk.empty:
+            # Aucune commande nouvelle ou modifiée : l'historique est exporté tel quel
+            data_izydesk = merged_data = None
+        else:
+            data_izydesk, merged_data = _traiter_commandes(
+                data_izydesk, df_prix_produits_cleaned, data_sextan, moteur, match_cache_path, profil
+            )
+            if anciens is not None:
+                # Les lignes des commandes modifiées sont remplacées par leur nouvelle version
+                izydesk_historique = izydesk_historique[~np.isin(cles_commandes(izydesk_historique), modifiees)]
+                merged_historique = merged_historique[~np.isin(cles_commandes(merged_historique), modifiees)]
+
+                # Doublons avec l'historique : la première occurrence (déjà traitée) est conservée
+                cles = pd.util.hash_pandas_object(merged_data[CLE_LIGNE_COMMANDE], index=False).to_numpy()
+                cles_historique = pd.util.hash_pandas_object(merged_historique[CLE_LIGNE_COMMANDE], index=False).to_numpy()
+                merged_data = merged_data[~np.isin(cles, cles_historique)].reset_index(drop=True)
+
+            with profil.etape("classement", len(merged_data)) as mesure:
+                merged_data = classer_familles(merged_data)
+                mesure["lignes_sortie"] = len(merged_data)
+
+        # Ajout à l'historique ; les commandes absentes du fichier courant restent dans l'historique
+        with profil.etape("historique") as mesure:
+            nouveau = data_izydesk is not None
+            data_izydesk = pd.concat([izydesk_historique, data_izydesk], ignore_index=True)
+            merged_data = pd.concat([merged_historique, merged_data], ignore_index=True)
+            if nouveau:
+                if commandes_historique is not None:
+                    connues = np.isin(commandes_historique["cle"].to_numpy(), commandes["cle"].to_numpy())
+                    commandes = pd.concat([commandes_historique[~connues], commandes], ignore_index=True)
+                historique.enregistrer(data_izydesk, merged_data, commandes, df_prix_produits_cleaned, moteur.empreinte)
+            mesure["lignes_sortie"] = len(merged_data)
+
+    # --- 11. Export ---
+    with profil.etape("export", len(data_izydesk) + len(merged_data)):
+        chemins_izydesk = exporter(data_izydesk, f"izydesk_auto_{nom_corner}", export_dir, export_formats)
+        chemins_merged = exporter(merged_data, f"merged_data_auto_{nom_corner}", export_dir, export_formats)
+        if exports is not None:
+            exports.update(izydesk=chemins_izydesk, merged=chemins_merged)
 
     return data_izydesk, merged_data
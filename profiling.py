@@ -0,0 +1,122 @@
+# profiling.py
+
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_mo():
+    """Mémoire résidente actuelle du processus (Mo), None si indisponible."""
+    try:
+        # Linux : deuxième champ de statm, en pages
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if psutil is not None:
+        return round(psutil.Process().memory_info().rss / 2**20, 1)
+    return None
+
+
+def _rss_max_mo():
+    """Pic de mémoire résidente du processus (Mo), None si indisponible."""
+    if resource is None:
+        return None
+    # ru_maxrss est en Ko sous Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class ProfilRun:
+    """Mesures par étape d'un traitement : durée, mémoire, lignes en entrée / sortie.
+
+    Chaque étape s'utilise comme contexte ; le dictionnaire retourné reçoit
+    le nombre de lignes produites :
+
+        with profil.etape("explode", lignes_entree=len(df)) as mesure:
+            df = explode_produits(df)
+            mesure["lignes_sortie"] = len(df)
+
+    La mémoire résidente est relevée au début et à la fin de chaque étape
+    (rss_debut_mo, rss_fin_mo, rss_delta_mo) ; elle inclut les autres threads
+    du processus. ``tracer_memoire`` ajoute le pic des allocations faites
+    pendant l'étape (tracemalloc, plus lent).
+    """
+
+    def __init__(self, tracer_memoire=True):
+        self.etapes = []
+        self.tracer_memoire = tracer_memoire
+        if tracer_memoire and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def debut_etape(self, nom):
+        """Appelée à l'entrée de chaque étape (suivi de l'avancement)."""
+
+    @contextmanager
+    def etape(self, nom, lignes_entree=None):
+        mesure = {"etape": nom, "lignes_entree": lignes_entree, "lignes_sortie": None}
+        self.debut_etape(nom)
+        if self.tracer_memoire:
+            tracemalloc.reset_peak()
+            alloue_debut = tracemalloc.get_traced_memory()[0]
+        rss_debut = _rss_mo()
+        debut = time.perf_counter()
+        try:
+            yield mesure
+        finally:
+            mesure["duree_s"] = round(time.perf_counter() - debut, 4)
+            rss_fin = _rss_mo()
+            mesure["rss_debut_mo"] = rss_debut
+            mesure["rss_fin_mo"] = rss_fin
+            mesure["rss_delta_mo"] = None if rss_debut is None or rss_fin is None else round(rss_fin - rss_debut, 1)
+            if self.tracer_memoire:
+                # Pic au-dessus de la mémoire déjà allouée au début de l'étape
+                mesure["pic_tracemalloc_mo"] = round((tracemalloc.get_traced_memory()[1] - alloue_debut) / 1e6, 1)
+            self.etapes.append(mesure)
+            logger.info(json.dumps(mesure, ensure_ascii=False))
+
+    def avancement(self, fait, total):
+        """Avancement à l'intérieur de l'étape en cours (ex. produits mis en correspondance)."""
+
+    def rapport(self):
+        return {
+            "duree_totale_s": round(sum(m["duree_s"] for m in self.etapes), 4),
+            # Pic depuis le démarrage du processus (serveur Streamlit : tous jobs confondus)
+            "rss_max_mo": _rss_max_mo(),
+            "etapes": self.etapes,
+        }
+
+    def ecrire_json(self, chemin):
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(self.rapport(), f, ensure_ascii=False, indent=2)
+
+    def arreter(self):
+        if self.tracer_memoire and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class ProfilInactif(ProfilRun):
+    """Profil sans mesure, utilisé quand aucun profil n'est demandé."""
+
+    def __init__(self):
+        super().__init__(tracer_memoire=False)
+
+    @contextmanager
+    def etape(self, nom, lignes_entree=None):
+        self.debut_etape(nom)
+        yield {}
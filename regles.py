@@ -0,0 +1,106 @@
+# regles.py
+#
+# Règles de classification familles / catégories, sous forme de tables.
+# Chaque table est une liste ordonnée (motif regex, résultat) : la première
+# règle dont le motif est trouvé dans le texte nettoyé (minuscules, sans
+# accents) s'applique. Modifier une règle ne demande pas de toucher au pipeline.
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Résultat spécial : la famille est le nom du produit nettoyé lui-même
+NOM_PRODUIT = object()
+
+# --- Familles manquantes, d'après produit_sextan ---
+REGLES_FAMILLE = [
+    (r"offert|offre|1.*achete", "offre"),
+    (r"\b(?:pepsi max|pepsi|ice tea peche)\b", NOM_PRODUIT),  # boissons : leur propre nom
+    (r"muffin", "dessert muffin"),
+    (r"cookie", "dessert cookie"),
+    (r"brownie", "dessert brownie"),
+    (r"sojasun|yaourt", "dessert yaourt"),
+    (r"frangipane|galette|gateau|buche", "dessert part de cake"),
+    (r"salade|bowl", "trefle salade"),
+    (r"porc", "trefle porc"),
+    (r"verre de vin rouge", "vin"),
+    (r"kit couverts inox", "kit couverts"),
+    (r"pain individuel|petit pain|pain de la veille", "pain"),
+    (r"pain polaire", "snack"),
+    (r"anti-gaspi", "anti-gaspi"),
+    (r"sac kraft", "autre"),
+    (r"pizza|focaccia|petites faims", "snack"),
+    (r"menu|^(?!.*2 \+ 1).*\+", "menu"),  # "menu" ou "+" hors offre "2 + 1"
+    (r"compte", "produit compte"),
+]
+
+# --- Familles anti-gaspi, d'après le produit Izydesk (prioritaires) ---
+REGLES_ANTI_GASPI = [
+    (r"^(?=.*gaspi).*plat", "plat"),
+    (r"^(?=.*gaspi).*dessert", "dessert"),
+    (r"gaspi", "anti-gaspi autre"),
+]
+
+BOISSONS = r"pepsi|max|coca|ice tea|orangina|cristaline|badoit|eau|vin|schweppes|jus|the|boisson|cafe|minute maid|tropicana"
+
+# --- Catégories, d'après la famille ---
+REGLES_CATEGORIE = [
+    (r"^dessert gourmand pot transparent thermo$", "dessert"),
+    (r"^anti-gaspi autre$", "autre"),
+    (r"kit couverts", "kit couverts"),
+    (r"salade|bowl|porc|plat", "plat"),  # salades & bowls
+    (r"offre|event|menu|compte|pain|autre", "autre"),
+    (r"snack|petite faim", "snack"),
+    (r"fruit|dessert", "dessert"),
+    (r"brownie", "dessert brownie"),
+    (r"cookie", "dessert cookie"),
+    (r"muffin", "dessert muffin"),
+    (BOISSONS, "boisson"),
+]
+
+# --- Catégories numériques de Sextan ---
+MAPPING_CATEGORIE = {
+    1: "entree",
+    2: "plat",
+    3: "dessert",
+    "1.0": "entree",
+    "2.0": "plat",
+    "3.0": "dessert",
+    "1": "entree",
+    "2": "plat",
+    "3": "dessert"
+}
+
+
+def compiler_regles(regles):
+    """Compile une table ; les règles consécutives de même résultat sont fusionnées en une regex."""
+    groupes = []
+    for motif, resultat in regles:
+        if groupes and groupes[-1][1] == resultat:
+            groupes[-1][0].append(motif)
+        else:
+            groupes.append(([motif], resultat))
+    return [
+        (re.compile("|".join(f"(?:{m})" for m in motifs)), resultat)
+        for motifs, resultat in groupes
+    ]
+
+
+def appliquer_regles(textes, regles_compilees):
+    """Évalue la table colonne par colonne ; NaN là où aucune règle ne s'applique."""
+    resultat = pd.Series(np.nan, index=textes.index, dtype=object)
+    restant = pd.Series(True, index=textes.index)
+    for motif, valeur in regles_compilees:
+        if not restant.any():
+            break
+        trouve = restant & textes.str.contains(motif)
+        resultat[trouve] = textes[trouve].str.strip() if valeur is NOM_PRODUIT else valeur
+        restant &= ~trouve
+    return resultat
+
+
+REGLES_FAMILLE_COMPILEES = compiler_regles(REGLES_FAMILLE)
+REGLES_ANTI_GASPI_COMPILEES = compiler_regles(REGLES_ANTI_GASPI)
+REGLES_CATEGORIE_COMPILEES = compiler_regles(REGLES_CATEGORIE)
+BOISSONS_COMPILEES = compiler_regles([(BOISSONS, "boisson")])
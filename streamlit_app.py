@@ -1,13 +1,89 @@
 import streamlit as st
 import pandas as pd
-import os
+import hashlib
+import json
+import tempfile
+import time
 from io import BytesIO
 
-def convert_df_to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False)
-    return output.getvalue()
+from jobs import ERREUR, ETAPES_INCREMENTAL, ETAPES_PIPELINE, GestionnaireJobs
+from matching import SEUIL_MATCH, SIGNAUX_COMBINES
+
+
+def read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def named_buffer(data, name):
+    buffer = BytesIO(data)
+    buffer.name = name
+    return buffer
+
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# --- Traitements exécutés en arrière-plan (voir jobs.py) ---
+# Fonctions appelées dans un thread de travail : aucun appel à st.* ici.
+def run_single(profil, sextan, izydesk, export_formats, incremental, parametres_matching):
+    from export import publier
+    from notebook_backend import process_files, process_files_incremental
+
+    exports = {}
+    traitement = process_files_incremental if incremental else process_files
+    # Exports écrits dans un dossier propre au job, publiés dans exports/ une fois complets
+    with tempfile.TemporaryDirectory(prefix="job_") as dossier:
+        izydesk_result, merged_result = traitement(
+            sextan, izydesk, export_dir=dossier, profil=profil, export_formats=export_formats, exports=exports,
+            parametres_matching=parametres_matching,
+        )
+        # Les classeurs déjà écrits par l'export servent aux téléchargements
+        izydesk_xlsx = read_bytes(exports["izydesk"]["xlsx"])
+        merged_xlsx = read_bytes(exports["merged"]["xlsx"])
+        publier(dossier, "exports")
+
+    return {
+        "izydesk": izydesk_result,
+        "merged": merged_result,
+        "izydesk_xlsx": izydesk_xlsx,
+        "merged_xlsx": merged_xlsx,
+        "rapport": profil.rapport(),
+    }
+
+
+def run_batch(profil, sextan, izydesks, export_formats, incremental, parametres_matching):
+    from batch import process_batch
+    from export import publier
+    from historique import CHEMIN_HISTORIQUE
+
+    exports = {}
+    with tempfile.TemporaryDirectory(prefix="job_") as dossier:
+        resultats = process_batch(sextan, izydesks, export_dir=dossier, export_formats=export_formats, profil=profil,
+                                  historique_dir=CHEMIN_HISTORIQUE if incremental else None,
+                                  parametres_matching=parametres_matching, exports=exports)
+        # Les classeurs consolidés déjà écrits par process_batch servent aux téléchargements
+        izydesk_xlsx = read_bytes(exports["izydesk"]["xlsx"])
+        merged_xlsx = read_bytes(exports["merged"]["xlsx"])
+        publier(dossier, "exports")
+    izydesk_result = pd.concat([izydesk for izydesk, _ in resultats.values()], ignore_index=True)
+    merged_result = pd.concat([merged for _, merged in resultats.values()], ignore_index=True)
+
+    return {
+        "par_corner": {buffer.name: merged for buffer, (_, merged) in resultats.items()},
+        "izydesk": izydesk_result,
+        "merged": merged_result,
+        "izydesk_xlsx": izydesk_xlsx,
+        "merged_xlsx": merged_xlsx,
+        "rapport": profil.rapport(),
+    }
+
+
+# Gestionnaire partagé par toutes les sessions : les jobs survivent aux rechargements de page
+@st.cache_resource
+def job_manager():
+    return GestionnaireJobs()
 
 
 # --- Interface Streamlit ---
@@ -15,29 +91,89 @@ st.title("Fusion automatique des données Sextan et Izydesk")
 
 # --- Upload des fichiers ---
 st.sidebar.header("Importer les fichiers")
-file_sextan = st.sidebar.file_uploader("Importer le fichier Sextan", type=["xlsx"])
-file_izydesk = st.sidebar.file_uploader("Importer le fichier Izydesk", type=["xlsx"])
+file_sextan = st.sidebar.file_uploader("Importer le fichier Sextan", type=["xlsx", "csv", "parquet"])
+files_izydesk = st.sidebar.file_uploader(
+    "Importer le(s) fichier(s) Izydesk", type=["xlsx", "csv", "parquet"], accept_multiple_files=True
+)
+formats_bi = st.sidebar.multiselect("Exports supplémentaires (chargement BI)", ["parquet", "csv"])
+export_formats = ("xlsx", *formats_bi)
+incremental = st.sidebar.checkbox(
+    "Mode incrémental", help="Ne traiter que les commandes nouvelles ou modifiées depuis le dernier passage (historique par corner)"
+)
+seuil = st.sidebar.slider("Seuil de correspondance", 50, 100, SEUIL_MATCH)
+score_combine = st.sidebar.checkbox(
+    "Score combiné", help="Noms sans volume, ratio + token_set_ratio + partial_ratio (plus lent)"
+)
+parametres_matching = {"seuil": seuil}
+if score_combine:
+    parametres_matching.update(signaux=SIGNAUX_COMBINES, normaliser=True)
 
 # --- Traitement si les deux fichiers sont chargés ---
-if file_sextan and file_izydesk:
-    st.success("Les deux fichiers sont chargés. Traitement en cours...")
+if file_sextan and files_izydesk:
+    st.success("Les fichiers sont chargés.")
+
+    # --- Fichiers uploadés gardés en mémoire, identifiés par le hash de leur contenu ---
+    sextan_bytes = file_sextan.getvalue()
+    izydesk_bytes = [f.getvalue() for f in files_izydesk]
+    sextan_buffer = named_buffer(sextan_bytes, file_sextan.name)
+    izydesk_buffers = [named_buffer(data, f.name) for data, f in zip(izydesk_bytes, files_izydesk)]
+    key_sextan = content_key(sextan_bytes)
+    keys_izydesk = tuple(content_key(data) for data in izydesk_bytes)
+
+    # Même contenu, mêmes formats et mêmes paramètres → même job, en cours ou déjà terminé
+    job_key = content_key("|".join([
+        key_sextan, *keys_izydesk, *export_formats, str(incremental), json.dumps(parametres_matching, sort_keys=True)
+    ]).encode())
+    label = ", ".join(f.name for f in files_izydesk)
+    # Un job en erreur n'est relancé que par le bouton "Relancer"
+    relancer = st.session_state.pop("relancer", False)
+    if len(izydesk_buffers) == 1:
+        job = job_manager().soumettre(
+            job_key, label, run_single, sextan_buffer, izydesk_buffers[0], export_formats, incremental,
+            parametres_matching, etapes=ETAPES_INCREMENTAL if incremental else ETAPES_PIPELINE, relancer=relancer,
+        )
+    else:
+        from batch import ETAPES_BATCH
+
+        job = job_manager().soumettre(
+            job_key, label, run_batch, sextan_buffer, izydesk_buffers, export_formats, incremental,
+            parametres_matching, etapes=ETAPES_BATCH, relancer=relancer,
+        )
+    # La clé du job dans l'URL permet de retrouver le traitement après rechargement
+    st.query_params["job"] = job.cle
+else:
+    job = job_manager().job(st.query_params.get("job", ""))
+
+# --- Suivi du traitement en arrière-plan ---
+if job is not None and not job.fini:
+    detail = f"étape {job.etape}" if job.etape else job.statut
+    if job.avancement_etape:
+        fait, total = job.avancement_etape
+        detail += f" ({fait} / {total})"
+    st.progress(job.progression, text=f"Traitement de {job.libelle} : {detail}")
+    time.sleep(1)
+    st.rerun()
 
-    # --- Sauvegarde temporaire des fichiers uploadés ---
-    temp_sextan = os.path.join("temp", file_sextan.name)
-    temp_izydesk = os.path.join("temp", file_izydesk.name)
-    os.makedirs("temp", exist_ok=True)
+elif job is not None and job.statut == ERREUR:
+    st.error(f"Le traitement de {job.libelle} a échoué : {job.erreur}")
+    if file_sextan and files_izydesk:
+        st.button("Relancer", on_click=st.session_state.update, kwargs={"relancer": True})
 
-    with open(temp_sextan, "wb") as f:
-        f.write(file_sextan.getbuffer())
+elif job is not None:
+    resultat = job.resultat
+    izydesk_result, merged_result = resultat["izydesk"], resultat["merged"]
+    st.success(f"Traitement de {job.libelle} terminé.")
 
-    with open(temp_izydesk, "wb") as f:
-        f.write(file_izydesk.getbuffer())
+    # --- Profil d'exécution ---
+    with st.expander("Profil d'exécution"):
+        st.write(f"Durée totale : {resultat['rapport']['duree_totale_s']:.1f} s")
+        st.dataframe(pd.DataFrame(resultat["rapport"]["etapes"]))
 
-    # --- Exécution du Notebook Backend ---
-    from notebook_backend import process_files
-    
-    # Appel de la fonction principale avec les chemins temporaires
-    izydesk_result, merged_result = process_files(temp_sextan, temp_izydesk)
+    if "par_corner" in resultat:
+        st.subheader("Résultats par corner")
+        for nom_fichier, merged_corner in resultat["par_corner"].items():
+            with st.expander(nom_fichier):
+                st.dataframe(merged_corner)
 
     # --- Affichage des résultats ---
     st.subheader("Résultats consolidés")
@@ -51,14 +187,14 @@ if file_sextan and file_izydesk:
     # --- Export ---
     st.download_button(
         label="Télécharger données Izydesk",
-        data=convert_df_to_excel(izydesk_result),
+        data=resultat["izydesk_xlsx"],
         file_name="izydesk_auto.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
     st.download_button(
         label="Télécharger données fusionnées",
-        data=convert_df_to_excel(merged_result),
+        data=resultat["merged_xlsx"],
         file_name="merged_data_auto.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
@@ -0,0 +1,5 @@
+# Modules du dépôt importables depuis tests/ (modules à plat à la racine)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,37 @@
+# Découpage vectorisé des noms Sextan : même résultat que split_product_info (ligne à ligne)
+import pandas as pd
+import pytest
+
+from notebook_backend import decouper_noms_sextan, split_product_info
+
+NOMS = {
+    "vide": "",
+    "separateur seul": "|",
+    "categorie seule": "Plat",
+    "produit": "Plat | Salade César",
+    "contenant": "Plat | Salade César | Bol kraft 750ml",
+    "dlc en dernier": "Plat | Salade César | Bol kraft 750ml | j+2",
+    "deux dlc": "a|b|j+1 j+2",
+    "dlc collee au contenant": "Plat | Wrap poulet | Boîte j+3",
+    "dlc collee, plusieurs contenants": "Plat | Wrap | Boîte | Sac kraft j+1",
+    "J+ majuscule": "Dessert | Tarte citron | Pot 500ml | J+2",
+    "J+ majuscule colle": "Dessert | Tarte citron | Pot 500ml J+2",
+    "elements vides": "Boisson || | ",
+    "espaces": "  Boisson  |  Pepsi Max 33 cl  |  Canette  ",
+}
+
+
+def attendu(noms):
+    return noms.apply(split_product_info)
+
+
+@pytest.mark.parametrize("nom", NOMS.values(), ids=NOMS.keys())
+def test_nom_seul(nom):
+    noms = pd.Series([nom])
+    pd.testing.assert_frame_equal(decouper_noms_sextan(noms), attendu(noms))
+
+
+def test_catalogue_melange():
+    # Nombre d'éléments différent d'une ligne à l'autre, index non standard
+    noms = pd.Series(list(NOMS.values()) * 2, index=range(100, 100 + 2 * len(NOMS)))
+    pd.testing.assert_frame_equal(decouper_noms_sextan(noms), attendu(noms))
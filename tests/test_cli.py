@@ -0,0 +1,28 @@
+# Ligne de commande : traitements planifiés vers un dossier d'exports encore inexistant
+import pytest
+
+from benchmark import generer_export_izydesk, generer_sextan
+from cli import ARGUMENTS_INVALIDES, OK, main
+
+
+@pytest.fixture
+def fichiers(tmp_path, monkeypatch):
+    # Caches (cache/...) créés dans le dossier temporaire
+    monkeypatch.chdir(tmp_path)
+    data_sextan = generer_sextan(60)
+    catalogue = data_sextan["Nom"].str.split("|").str[1].str.strip()
+    path_sextan, path_izydesk = tmp_path / "sextan.xlsx", tmp_path / "izydesk_toulouse_janvier.xlsx"
+    data_sextan.to_excel(path_sextan, index=False)
+    generer_export_izydesk(40, catalogue).to_excel(path_izydesk, index=False)
+    return str(path_sextan), str(path_izydesk)
+
+
+@pytest.mark.parametrize("options", [[], ["--par-blocs", "25"], ["--formats", "xlsx", "csv"]])
+def test_dossier_exports_cree(fichiers, tmp_path, options):
+    exports = tmp_path / "exports" / "2024-01-31"
+    assert main([*fichiers, "--exports", str(exports), *options]) == OK
+    assert (exports / "merged_data_auto_toulouse.xlsx").exists()
+
+
+def test_fichier_absent(fichiers, tmp_path):
+    assert main([fichiers[0], str(tmp_path / "izydesk_*.csv")]) == ARGUMENTS_INVALIDES
@@ -0,0 +1,64 @@
+# Détection du corner d'un export Izydesk d'après le registre
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from corners import catalogue_corner, charger_registre, detecter_corner
+
+
+@pytest.fixture
+def registre(tmp_path):
+    chemin = tmp_path / "corners.json"
+    chemin.write_text(json.dumps({"corners": [
+        {"id_corner": "004", "nom_corner": "toulouse", "mots_cles": ["toulouse", "capitole"]},
+        {"id_corner": "002", "nom_corner": "nimes"},
+        {"id_corner": 7, "nom_corner": "lyon", "catalogue": {"categorie": ["plat"]}},
+    ]}), encoding="utf-8")
+    return charger_registre(str(chemin))
+
+
+def export(**colonnes):
+    return pd.DataFrame({"id_commande": ["C1", "C2", "C3"], **colonnes})
+
+
+def test_contenu_id_texte(registre):
+    corner = detecter_corner(export(id_corner=["004", "004", "002"]), "export.xlsx", registre)
+    assert corner["nom_corner"] == "toulouse"
+
+
+def test_contenu_id_flottant_avec_cellules_vides(registre):
+    # Colonne numérique avec des vides : lue en float64 (4.0, NaN)
+    corner = detecter_corner(export(id_corner=[4.0, np.nan, 4.0]), "export.xlsx", registre)
+    assert corner["nom_corner"] == "toulouse"
+    assert detecter_corner(export(id_corner=[7, 7, 2]), "export.xlsx", registre)["nom_corner"] == "lyon"
+
+
+def test_contenu_nom_corner_avec_accents(registre):
+    corner = detecter_corner(export(**{"Nom Corner": ["Nîmes", "Nîmes", None]}), "export.xlsx", registre)
+    assert corner["nom_corner"] == "nimes"
+
+
+def test_contenu_prioritaire_sur_nom_de_fichier(registre, caplog):
+    corner = detecter_corner(export(id_corner=["002"] * 3), "izydesk_toulouse_janvier.xlsx", registre)
+    assert corner["nom_corner"] == "nimes"
+    assert "toulouse" in caplog.text
+
+
+def test_nom_de_fichier_sans_colonne_corner(registre):
+    assert detecter_corner(export(), "exports/Izydesk_Capitole_janvier.xlsx", registre)["nom_corner"] == "toulouse"
+    assert detecter_corner(export(id_corner=[None] * 3), "izydesk_nimes.xlsx", registre)["nom_corner"] == "nimes"
+
+
+def test_corner_introuvable(registre):
+    with pytest.raises(ValueError, match="Corner introuvable"):
+        detecter_corner(export(id_corner=["999"] * 3), "izydesk_paris.xlsx", registre)
+
+
+def test_catalogue_corner(registre):
+    data_sextan = pd.DataFrame({"produit_sextan": ["salade", "eau", "wrap"], "categorie": ["plat", "boisson", "plat"]})
+    assert catalogue_corner(data_sextan, "lyon", registre)["produit_sextan"].tolist() == ["salade", "wrap"]
+    assert catalogue_corner(data_sextan, "nimes", registre) is data_sextan
+    with pytest.raises(ValueError):
+        catalogue_corner(data_sextan, "paris", registre)
@@ -0,0 +1,56 @@
+# Éclatement vectorisé des produits : même résultat que la version ligne à ligne
+import numpy as np
+import pandas as pd
+import pytest
+
+from notebook_backend import explode_produits, extract_products_corrected
+
+
+def commandes(produits, index=None):
+    """Commandes Izydesk après préparation des colonnes, une par valeur de ``produits``."""
+    n = len(produits)
+    return pd.DataFrame(
+        {
+            "id_corner": ["004"] * n,
+            "nom corner": ["toulouse"] * n,
+            "id_commande": [f"C{i}" for i in range(n)],
+            "date": ["02/01/2024"] * n,
+            "heure": ["12:15"] * n,
+            "service": ["Midi"] * n,
+            "produits": produits,
+            "ht": np.linspace(5, 20, n),
+            "ttc": np.linspace(5.5, 22, n),
+            "paiements": ["CB:12,50€"] * n,
+        },
+        index=index,
+    )
+
+
+CAS = {
+    "simple": ["2x Salade César", "1x Pepsi Max 33 cl"],
+    "multi_lignes": ["2x tarte citron bio\n3x Ice Tea Pêche 33 cl xl", "1x Pain individuel bio"],
+    "produits_manquants": [np.nan, "1x Cookie", None, "2x Muffin\n1x Café"],
+    "lignes_non_conformes": ["1x Wrap thon\nremise fidélité", "remise fidélité\n2x Brownie", "1x Quiche"],
+    "retours_chariot_espaces": ["2x Salade César \r\n1x Eau 50cl\r", "  3x Cookie  ", "1x Bowl poulet\r"],
+    "quantite_nulle": ["0x Café offert", "0x Kit couverts inox\n1x Menu midi"],
+}
+
+
+@pytest.mark.parametrize("cas", CAS)
+def test_explode_identique_a_iterrows(cas):
+    df = commandes(CAS[cas])
+    pd.testing.assert_frame_equal(explode_produits(df), extract_products_corrected(df))
+
+
+@pytest.mark.parametrize("index", [[10, 3, 7, 42], ["a", "b", "c", "d"], [5, 5, 6, 6]])
+def test_explode_index_non_standard(index):
+    df = commandes(["2x Muffin\n1x Café", np.nan, "remise fidélité\n1x Wrap", "0x Pain\r\n3x Cookie "], index=index)
+    obtenu = explode_produits(df)
+    pd.testing.assert_frame_equal(obtenu, extract_products_corrected(df))
+    assert list(obtenu.index) == [index[0], index[0], index[2], index[3], index[3]]
+
+
+def test_explode_quantites_et_noms():
+    obtenu = explode_produits(commandes(["2x Salade César \r\n0x Café offert", "remise fidélité"]))
+    assert obtenu["quantité"].tolist() == [2, 0]
+    assert obtenu["produit"].tolist() == ["Salade César", "Café offert"]
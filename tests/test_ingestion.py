@@ -0,0 +1,38 @@
+# Lecture des exports csv : format français (";" et virgule décimale) et format international
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from ingestion import lire_tableau
+from notebook_backend import explode_produits, preparer_izydesk, table_prix_unitaires
+
+CSV_FR = (
+    "﻿Commandes du 01/01/2024 au 31/01/2024;Date;Heure;Service;Produits;HT;TTC;Paiements\n"
+    "C0;23/01/2024;20:18;Soir;2x Salade César;9,09;10,00;CB:10,00€\n"
+    'C1;23/01/2024;12:05;Midi;"1x Pepsi Max 33 cl\n1x Salade César";6,5;7,15;Espèces:7,15€\n'
+    "C2;24/01/2024;12:30;Midi;3x Café;3;3,3;CB:3,30€\n"
+).encode("utf-8")
+
+CSV_INTERNATIONAL = (
+    "Commandes du 01/01/2024 au 31/01/2024,Date,Heure,Service,Produits,HT,TTC,Paiements\n"
+    "C0,23/01/2024,20:18,Soir,2x Salade César,9.09,10.00,CB:10.00€\n"
+).encode("utf-8")
+
+
+@pytest.mark.parametrize("contenu", [CSV_FR, CSV_INTERNATIONAL])
+def test_montants_numeriques(contenu):
+    data = lire_tableau(BytesIO(contenu), "izydesk_nimes_janvier.csv")
+    assert data.columns[0].startswith("Commandes du")
+    assert pd.api.types.is_float_dtype(data["HT"]) and pd.api.types.is_float_dtype(data["TTC"])
+    assert data.loc[0, "HT"] == pytest.approx(9.09)
+
+
+def test_prix_unitaires_csv_francais():
+    data = lire_tableau(BytesIO(CSV_FR), "izydesk_nimes_janvier.csv")
+    data, nom_corner = preparer_izydesk(data, "izydesk_nimes_janvier.csv")
+    prix = table_prix_unitaires(explode_produits(data)).set_index("produit")
+    assert nom_corner == "nimes"
+    assert prix.loc["Salade César", "ht_unitaire"] == pytest.approx(4.545)
+    assert prix.loc["Café", "ttc_unitaire"] == pytest.approx(1.1)
+    assert "Pepsi Max 33 cl" not in prix.index
@@ -0,0 +1,39 @@
+# Gestionnaire de jobs : un job en erreur reste affiché jusqu'à une relance explicite
+import time
+
+from jobs import ERREUR, TERMINE, GestionnaireJobs
+
+
+def attendre(job, delai=5):
+    fin = time.time() + delai
+    while not job.fini and time.time() < fin:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_en_erreur_renvoye_sans_relance():
+    appels = []
+
+    def echoue(profil):
+        appels.append(1)
+        raise ValueError("fichier illisible")
+
+    gestionnaire = GestionnaireJobs(workers=1)
+    job = attendre(gestionnaire.soumettre("cle", "izydesk.xlsx", echoue))
+    assert job.statut == ERREUR and "fichier illisible" in job.erreur
+
+    # Rafraîchissements de la page : même job, pas de nouvel essai
+    for _ in range(3):
+        assert gestionnaire.soumettre("cle", "izydesk.xlsx", echoue) is job
+    assert len(appels) == 1
+
+    relance = attendre(gestionnaire.soumettre("cle", "izydesk.xlsx", echoue, relancer=True))
+    assert relance is not job and relance.statut == ERREUR
+    assert len(appels) == 2
+
+
+def test_job_termine_non_relance():
+    gestionnaire = GestionnaireJobs(workers=1)
+    job = attendre(gestionnaire.soumettre("cle", "izydesk.xlsx", lambda profil: 42))
+    assert job.statut == TERMINE and job.resultat == 42
+    assert gestionnaire.soumettre("cle", "izydesk.xlsx", lambda profil: 0, relancer=True) is job
@@ -0,0 +1,82 @@
+# Jointure gauche par positions : même résultat que DataFrame.merge(how="left")
+import numpy as np
+import pandas as pd
+import pytest
+
+from jointure import jointure_gauche
+from notebook_backend import fusionner_sextan, fusionner_sextan_merge
+
+VALEURS = ["a", "b", "c", "d", None, np.nan]
+
+
+def tables(seed, nb_gauche=200, nb_droite=30):
+    rng = np.random.default_rng(seed)
+    gauche = pd.DataFrame({
+        "cle": pd.Series(rng.choice(np.array(VALEURS, dtype=object), nb_gauche), dtype=object),
+        "commune": rng.integers(0, 5, nb_gauche),
+        "x": rng.random(nb_gauche),
+    })
+    # Clés en double et manquantes à droite aussi
+    droite = pd.DataFrame({
+        "cle": pd.Series(rng.choice(np.array(VALEURS[:3] + [None, np.nan], dtype=object), nb_droite), dtype=object),
+        "commune": rng.integers(0, 5, nb_droite),
+        "y": rng.integers(0, 100, nb_droite),
+    })
+    return gauche, droite
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_comme_merge(seed):
+    gauche, droite = tables(seed)
+    attendu = gauche.merge(droite, on="cle", how="left")
+    pd.testing.assert_frame_equal(jointure_gauche(gauche, droite, "cle"), attendu)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_premiere_correspondance(seed):
+    gauche, droite = tables(seed)
+    attendu = (
+        gauche.assign(ligne=np.arange(len(gauche)))
+        .merge(droite, on="cle", how="left")
+        .drop_duplicates("ligne")
+        .drop(columns="ligne")
+        .reset_index(drop=True)
+    )
+    pd.testing.assert_frame_equal(jointure_gauche(gauche, droite, "cle", premiere=True), attendu)
+
+
+def test_none_et_nan_apparies():
+    gauche = pd.DataFrame({"cle": ["a", None, np.nan], "x": [1, 2, 3]})
+    droite = pd.DataFrame({"cle": [np.nan, "a"], "y": [10, 20]})
+    resultat = jointure_gauche(gauche, droite, "cle")
+    assert resultat["y"].tolist() == [20, 10, 10]
+
+
+def test_cles_differentes_et_index_quelconque():
+    gauche = pd.DataFrame({"produit": ["b", "a", "z", "a"], "x": range(4)}, index=[10, 3, 7, 3])
+    droite = pd.DataFrame({"nom": ["a", "b", "a"], "prix": [1.0, 2.0, 3.0]})
+    attendu = gauche.merge(droite, left_on="produit", right_on="nom", how="left")
+    pd.testing.assert_frame_equal(jointure_gauche(gauche, droite, "produit", "nom"), attendu)
+
+
+def test_fusionner_sextan_comme_merge():
+    rng = np.random.default_rng(0)
+    n = 300
+    data_izydesk = pd.DataFrame({
+        "id_commande": rng.integers(0, 60, n).astype(str),
+        "date": "02/01/2024",
+        "heure": "12:15",
+        "service": "Midi",
+        "produit": rng.choice(["salade", "wrap", "pepsi", "inconnu"], n),
+        "quantité": rng.integers(1, 3, n),
+    })
+    data_izydesk["produit_match"] = data_izydesk["produit"].where(data_izydesk["produit"] != "inconnu", None)
+    # Même nom dans deux catégories : la première fiche est gardée
+    data_sextan = pd.DataFrame({
+        "id_sextan": range(4),
+        "produit_sextan": ["salade", "wrap", "pepsi", "salade"],
+        "famille": ["Salade", None, "Pepsi", "Plat"],
+    })
+    pd.testing.assert_frame_equal(
+        fusionner_sextan(data_izydesk, data_sextan), fusionner_sextan_merge(data_izydesk, data_sextan)
+    )
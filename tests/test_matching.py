@@ -0,0 +1,63 @@
+# Moteur de correspondance : candidats par argpartition identiques à un tri complet
+import random
+
+import numpy as np
+import pytest
+
+from matching import SIGNAUX_COMBINES, MoteurMatching, find_best_match
+
+MOTS = ["salade", "cesar", "poulet", "wrap", "pepsi", "max", "coca", "cola", "eau", "evian", "tarte", "citron"]
+
+
+def catalogue(taille, seed=0):
+    rng = random.Random(seed)
+    noms = {" ".join(rng.sample(MOTS, rng.randint(1, 3))) + rng.choice(["", " 33 cl", " 50cl"]) for _ in range(taille)}
+    # Doublons de noms proches : nombreux scores à égalité
+    return sorted(noms) + ["salade cesar", "salade cesar ", "cesar salade"]
+
+
+def candidats_tri_complet(moteur, requetes):
+    scores = moteur.scores(requetes)
+    rangs = np.argsort(-scores, axis=1, kind="stable")[:, :moteur.nb_candidats]
+    return [
+        tuple((moteur.produits[i], round(float(ligne[i]), 2)) for i in indices if ligne[i] > 0)
+        for ligne, indices in zip(scores, rangs)
+    ]
+
+
+@pytest.mark.parametrize("parametres", [{}, {"signaux": SIGNAUX_COMBINES, "normaliser": True}, {"nb_candidats": 1}])
+def test_candidats_comme_tri_complet(parametres):
+    produits = catalogue(200)
+    requetes = [p[:-1] for p in produits[::3]] + ["salade cesar", "", "zzz"]
+    moteur = MoteurMatching(produits, workers=1, **parametres)
+    moteur.taille_lot = 7  # plusieurs lots, dernier incomplet
+    assert moteur.candidats(requetes) == candidats_tri_complet(moteur, requetes)
+
+
+def test_meme_correspondance_que_find_best_match():
+    produits = catalogue(200, seed=1)
+    requetes = [p[1:] for p in produits] + ["salade cesar", "cesar"]
+    moteur = MoteurMatching(produits, workers=1)
+    assert [moteur.retenu(c) for c in moteur.candidats(requetes)] == [find_best_match(r, produits) for r in requetes]
+
+
+def test_catalogue_plus_petit_que_nb_candidats():
+    moteur = MoteurMatching(["eau evian"], nb_candidats=3)
+    assert moteur.candidats(["eau evian", "zzz"]) == [(("eau evian", 100.0),), ()]
+    assert MoteurMatching([]).candidats(["eau"]) == [()]
+
+
+def test_taille_lot_selon_budget():
+    petit, grand = MoteurMatching(["a"] * 10), MoteurMatching(["a"] * 100_000)
+    assert petit.taille_lot > grand.taille_lot >= 1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_candidats_noms_varies(seed):
+    # Longueurs très variées, doublons et noms vides : mêmes candidats que le tri complet
+    rng = random.Random(seed)
+    produits = ["".join(rng.choice("abcde ") for _ in range(rng.randint(0, 40))) for _ in range(300)]
+    requetes = [p[rng.randint(0, 3):] for p in produits[:60]] + ["", "a", "abcde" * 10]
+    for nb_candidats in (1, 3, 5):
+        moteur = MoteurMatching(produits, nb_candidats=nb_candidats, seuil=60)
+        assert moteur.candidats(requetes) == candidats_tri_complet(moteur, requetes)
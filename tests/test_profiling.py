@@ -0,0 +1,39 @@
+# Profil d'exécution : mémoire résidente et pic tracemalloc par étape
+import numpy as np
+
+from profiling import ProfilInactif, ProfilRun
+
+
+def test_memoire_par_etape():
+    profil = ProfilRun(tracer_memoire=False)
+    with profil.etape("petite"):
+        pass
+    with profil.etape("allocation", lignes_entree=10) as mesure:
+        tableau = np.ones(64 * 2**20 // 8)
+        mesure["lignes_sortie"] = len(tableau)
+    petite, allocation = profil.etapes
+    assert "pic_tracemalloc_mo" not in allocation
+    assert allocation["rss_fin_mo"] >= allocation["rss_debut_mo"]
+    assert allocation["rss_delta_mo"] >= 50 > petite["rss_delta_mo"]
+    # ru_maxrss (pic du processus) et statm ne comptent pas tout à fait les mêmes pages
+    assert profil.rapport()["rss_max_mo"] >= allocation["rss_delta_mo"]
+
+
+def test_pic_tracemalloc():
+    profil = ProfilRun(tracer_memoire=True)
+    try:
+        with profil.etape("temporaire"):
+            np.ones(32 * 2**20 // 8).sum()
+        with profil.etape("legere"):
+            pass
+    finally:
+        profil.arreter()
+    temporaire, legere = profil.etapes
+    assert temporaire["pic_tracemalloc_mo"] >= 30 > legere["pic_tracemalloc_mo"]
+
+
+def test_profil_inactif():
+    profil = ProfilInactif()
+    with profil.etape("explode") as mesure:
+        mesure["lignes_sortie"] = 1
+    assert profil.etapes == []